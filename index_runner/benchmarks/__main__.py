@@ -0,0 +1,69 @@
+"""
+    Runs every benchmark at one size and writes the results to json, so that versions can be compared.
+
+    run from index_runner: python -m benchmarks [small|medium|large] [output path]
+"""
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from os import getcwd, makedirs, path as os_path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import candlestick_benchmark, costs_benchmark, kaufman_benchmark, ohlc_benchmark, rsi_benchmark, \
+    slope_benchmark
+
+# bars are the length of a single series e.g. the ticks of a stock, rows and symbols the size of the daily matrix
+SIZES = {
+    "small": {"bars": 1_000, "rows": 250, "symbols": 10, "trades": 10_000, "repeat": 3},
+    "medium": {"bars": 100_000, "rows": 250, "symbols": 500, "trades": 100_000, "repeat": 3},
+    "large": {"bars": 1_000_000, "rows": 1_000, "symbols": 5_000, "trades": 1_000_000, "repeat": 1},
+}
+
+
+def commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except:
+        return None
+
+
+def run(size: str = "small") -> dict:
+    """
+    :param size: one of SIZES
+    :return: results of every benchmark with the details of the machine and the version of the code
+    """
+    bars, rows, symbols, trades, repeat = (SIZES[size][key] for key in ["bars", "rows", "symbols", "trades", "repeat"])
+
+    return {
+        "size": size,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.platform(),
+        "results": {
+            "kaufman_indicator": kaufman_benchmark.run(rows, symbols, repeat),
+            "calculate_rsi": rsi_benchmark.run(rows, symbols, repeat),
+            "candlestick": candlestick_benchmark.run(bars, repeat),
+            "get_ohlc": ohlc_benchmark.run(bars, repeat=repeat),
+            "slope_features": slope_benchmark.run(rows, symbols, repeat),
+            "transaction_costs": costs_benchmark.run(trades, repeat)
+        }
+    }
+
+
+if __name__ == "__main__":
+    size = sys.argv[1] if len(sys.argv) > 1 else "small"
+    results = run(size)
+
+    output = sys.argv[2] if len(sys.argv) > 2 else \
+        getcwd() + f"/temp/benchmarks/{size}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    makedirs(os_path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=4)
+    print(f"results written to {output}")
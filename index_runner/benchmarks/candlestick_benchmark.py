@@ -0,0 +1,49 @@
+"""
+    Times has_pattern of every CandlestickFinder subclass and the scan of all of them together.
+
+    run from index_runner: python -m benchmarks.candlestick_benchmark
+"""
+import pkgutil
+from importlib import import_module
+
+from benchmarks.data import random_ohlc
+from benchmarks.timing import best_of
+from utils.indicators.candlestick import patterns
+from utils.indicators.candlestick.pattern_scanner import PatternScanner
+from utils.indicators.candlestick.patterns.candlestick_finder import CandlestickFinder
+
+OHLC = ['Open', 'High', 'Low', 'Close']
+
+
+def pattern_classes() -> list[type]:
+    """
+    :return: every subclass of CandlestickFinder in the patterns package, sorted by name
+    """
+    for module in pkgutil.iter_modules(patterns.__path__):
+        import_module(f"{patterns.__name__}.{module.name}")
+    return sorted(CandlestickFinder.__subclasses__(), key=lambda pattern: pattern.__name__)
+
+
+def run(bars: int = 100_000, repeat: int = 3) -> dict:
+    """
+    :param bars: number of candles
+    :param repeat: the best of these many runs is taken
+    :return: seconds taken by each pattern and by the scanner over all the candles and over the latest one
+    """
+    candles = random_ohlc(bars)
+    classes = pattern_classes()
+    scanner = PatternScanner(classes)
+
+    return {
+        "bars": bars,
+        "has_pattern_seconds": {
+            pattern.__name__: best_of(lambda: pattern(target='pattern').has_pattern(candles, OHLC, False), repeat)
+            for pattern in classes
+        },
+        "scan_seconds": best_of(lambda: scanner.scan(candles, OHLC), repeat),
+        "scan_latest_seconds": best_of(lambda: scanner.scan(candles, OHLC, last_n=1), repeat)
+    }
+
+
+if __name__ == "__main__":
+    print(run())
@@ -0,0 +1,28 @@
+"""
+    Times the transaction costs of delivery and intraday trades.
+
+    run from index_runner: python -m benchmarks.costs_benchmark
+"""
+from benchmarks.data import random_trades
+from benchmarks.timing import best_of
+from models.costs.delivery_trading_cost import DeliveryTransactionCost
+from models.costs.intraday_trading_cost import IntradayTransactionCost
+
+
+def run(trades: int = 100_000, repeat: int = 3) -> dict:
+    """
+    :param trades: number of trades
+    :param repeat: the best of these many runs is taken
+    :return: seconds taken for the net profit or loss of all the trades with each cost
+    """
+    rows = [(float(buying), float(selling), int(quantity)) for buying, selling, quantity in random_trades(trades)]
+
+    return {
+        "trades": trades,
+        "delivery_seconds": best_of(lambda: sum(DeliveryTransactionCost(*row).net_pl for row in rows), repeat),
+        "intraday_seconds": best_of(lambda: sum(IntradayTransactionCost(*row).net_pl for row in rows), repeat)
+    }
+
+
+if __name__ == "__main__":
+    print(run())
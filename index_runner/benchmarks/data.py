@@ -0,0 +1,41 @@
+"""
+    Synthetic data of the benchmarks, the same seed always gives the same data.
+"""
+import numpy as np
+import pandas as pd
+
+
+def random_prices(rows: int, symbols: int, seed: int = 0) -> np.ndarray:
+    """
+    :return: random walk of prices rounded to the tick size, kept above 1, with some flat stretches for zero volatility
+    """
+    rng = np.random.default_rng(seed)
+    prices = np.abs(np.round(100 + np.cumsum(rng.normal(0, 0.5, (rows, symbols)), axis=0), 1)) + 1
+    for column in range(0, symbols, 10):
+        prices[rows // 4:rows // 4 + 20, column] = prices[rows // 4, column]
+    return prices
+
+
+def random_ohlc(rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    :return: candles with the columns Open, High, Low and Close, a tenth of them with the same open and close
+    """
+    rng = np.random.default_rng(seed)
+    open_price = random_prices(rows, 1, seed)[:, 0]
+    close_price = np.round(open_price + rng.normal(0, 1, rows), 1)
+    doji = rng.random(rows) < 0.1
+    close_price[doji] = open_price[doji]
+    high_price = np.round(np.maximum(open_price, close_price) + np.abs(rng.normal(0, 0.5, rows)), 1)
+    low_price = np.round(np.minimum(open_price, close_price) - np.abs(rng.normal(0, 0.5, rows)), 1)
+    return pd.DataFrame({"Open": open_price, "High": high_price, "Low": low_price, "Close": close_price})
+
+
+def random_trades(count: int, seed: int = 0) -> np.ndarray:
+    """
+    :return: rows of buying price, selling price and quantity
+    """
+    rng = np.random.default_rng(seed)
+    buying_price = np.round(rng.uniform(10, 3000, count), 2)
+    selling_price = np.round(buying_price * rng.uniform(0.95, 1.08, count), 2)
+    quantity = rng.integers(1, 500, count)
+    return np.column_stack([buying_price, selling_price, quantity])
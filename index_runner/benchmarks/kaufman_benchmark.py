@@ -0,0 +1,45 @@
+"""
+    Compares kaufman_indicator called once per symbol with kaufman_indicator_batch over the whole matrix.
+
+    run from index_runner: python -m benchmarks.kaufman_benchmark
+"""
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.data import random_prices
+from utils.indicators.kaufman_indicator import kaufman_indicator, kaufman_indicator_batch
+
+
+def run(rows: int = 250, symbols: int = 2000, repeat: int = 3) -> dict:
+    """
+    :param rows: number of prices of each symbol
+    :param symbols: number of symbols
+    :param repeat: the best of these many runs is taken
+    :return: seconds taken by each implementation and whether their results are the same
+    """
+    prices = random_prices(rows, symbols)
+
+    per_symbol, batch = float("inf"), float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        expected = np.column_stack([kaufman_indicator(pd.Series(prices[:, column])) for column in range(symbols)])
+        per_symbol = min(per_symbol, perf_counter() - start)
+
+        start = perf_counter()
+        result = kaufman_indicator_batch(prices)
+        batch = min(batch, perf_counter() - start)
+
+    return {
+        "rows": rows,
+        "symbols": symbols,
+        "per_symbol_seconds": per_symbol,
+        "batch_seconds": batch,
+        "speedup": per_symbol / batch,
+        "identical": bool(np.array_equal(expected, result, equal_nan=True))
+    }
+
+
+if __name__ == "__main__":
+    print(run())
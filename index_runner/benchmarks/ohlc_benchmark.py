@@ -0,0 +1,47 @@
+"""
+    Times StockInfo.get_ohlc of both shifts, once after loading all the ticks and then for every new tick.
+
+    run from index_runner: python -m benchmarks.ohlc_benchmark
+"""
+from time import perf_counter
+
+from constants.enums.shift import Shift
+from benchmarks.data import random_prices
+from benchmarks.timing import best_of
+from models.stock_info import StockInfo
+
+
+def run(ticks: int = 100_000, new_ticks: int = 100, repeat: int = 3) -> dict:
+    """
+    :param ticks: number of ticks of the stock
+    :param new_ticks: number of ticks received one at a time after loading the others
+    :param repeat: the best of these many runs is taken
+    :return: seconds taken to load the ticks and the average seconds taken per new tick
+    """
+    prices = random_prices(ticks + new_ticks, 1)[:, 0]
+
+    def load() -> StockInfo:
+        stock = StockInfo("BENCHMARK")
+        stock.update_bars(prices[:ticks])
+        stock.get_ohlc(Shift.MORNING)
+        stock.get_ohlc(Shift.EVENING)
+        return stock
+
+    def tick() -> float:
+        stock = load()
+        start = perf_counter()
+        for count in range(ticks + 1, ticks + new_ticks + 1):
+            stock.update_bars(prices[:count])
+            stock.get_ohlc(Shift.MORNING)
+            stock.get_ohlc(Shift.EVENING)
+        return perf_counter() - start
+
+    return {
+        "ticks": ticks,
+        "load_seconds": best_of(load, repeat),
+        "tick_seconds": min(tick() for _ in range(repeat)) / new_ticks
+    }
+
+
+if __name__ == "__main__":
+    print(run())
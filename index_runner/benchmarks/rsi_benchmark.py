@@ -0,0 +1,30 @@
+"""
+    Times calculate_rsi over every symbol.
+
+    run from index_runner: python -m benchmarks.rsi_benchmark
+"""
+import pandas as pd
+
+from benchmarks.data import random_prices
+from benchmarks.timing import best_of
+from utils.indicators.rsi import calculate_rsi
+
+
+def run(rows: int = 250, symbols: int = 500, repeat: int = 3) -> dict:
+    """
+    :param rows: number of prices of each symbol
+    :param symbols: number of symbols
+    :param repeat: the best of these many runs is taken
+    :return: seconds taken for all the symbols
+    """
+    series = [pd.Series(column) for column in random_prices(rows, symbols).T]
+
+    return {
+        "rows": rows,
+        "symbols": symbols,
+        "seconds": best_of(lambda: [calculate_rsi(prices) for prices in series], repeat)
+    }
+
+
+if __name__ == "__main__":
+    print(run())
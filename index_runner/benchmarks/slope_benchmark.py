@@ -0,0 +1,32 @@
+"""
+    Times the slope features of the training and of the predictions over every symbol.
+
+    run from index_runner: python -m benchmarks.slope_benchmark
+"""
+from benchmarks.data import random_prices
+from benchmarks.timing import best_of
+from utils.indicators.rolling_slope import rolling_slope, slope_features, SLOPE_WINDOWS
+
+
+def run(rows: int = 250, symbols: int = 500, repeat: int = 3) -> dict:
+    """
+    :param rows: number of daily prices of each symbol
+    :param symbols: number of symbols
+    :param repeat: the best of these many runs is taken
+    :return: seconds taken for the features of every row and for the features of the latest row
+    """
+    prices = random_prices(rows, symbols)
+
+    return {
+        "rows": rows,
+        "symbols": symbols,
+        "all_rows_seconds": best_of(lambda: slope_features(prices), repeat),
+        "latest_row_seconds": best_of(
+            lambda: [rolling_slope(prices[-window:], len(prices[-window:]))[-1] for window in SLOPE_WINDOWS.values()],
+            repeat
+        )
+    }
+
+
+if __name__ == "__main__":
+    print(run())
@@ -0,0 +1,16 @@
+from time import perf_counter
+from typing import Callable
+
+
+def best_of(function: Callable, repeat: int = 3) -> float:
+    """
+    :param function: called without arguments
+    :param repeat: number of runs
+    :return: seconds taken by the fastest run, the others are slowed down by the rest of the machine
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        best = min(best, perf_counter() - start)
+    return best
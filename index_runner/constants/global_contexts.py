@@ -1,11 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from kiteconnect import KiteConnect
 
 from constants.kite_credentials import API_KEY
+from constants.settings import KITE_MAX_WORKERS
 
 kite_context = KiteConnect(
     api_key=API_KEY
 )
 
+# blocking kite calls are run in this pool so that they do not block the event loop
+kite_executor = ThreadPoolExecutor(max_workers=KITE_MAX_WORKERS)
+
 
 def set_access_token(access_token: str):
     global kite_context
@@ -10,6 +10,8 @@ TODAY = datetime(2024, 11, 14) if DEBUG else datetime.now()
 TRAINING_DATE = datetime(2024, 11, 13) if DEBUG else datetime.now()
 
 GENERATOR_URL = '127.0.0.1:8082'
+# websocket uri of the ticker, None uses the kite ticker. for offline testing use the fake ticker server
+TICKER_ROOT_URI = None
 MIS_STOCK_LIST = "https://docs.google.com/spreadsheets/d/1fLTsNpFJPK349RTjs0GRSXJZD-5soCUkZt9eSMTJ2m4/export?format=csv"
 
 if DEBUG:
@@ -30,6 +32,22 @@ else:
     BUY_SHORTS = datetime(__current_time.year, __current_time.month, __current_time.day, 15, 17, 0)
 
 SLEEP_INTERVAL = 1 if DEBUG else 45
+STOP_LOSS_CHECK_INTERVAL = 1  # seconds between the checks of the ticks of the positions while sleeping
+PREDICTION_WINDOW = 2000  # latest intraday prices kept for the predictions
+
+# kite api limits
+KITE_QUOTE_REQUESTS_PER_SECOND = 1  # quota shared by quote, ltp and ohlc
+KITE_ORDER_REQUESTS_PER_SECOND = 10
+KITE_API_REQUESTS_PER_SECOND = 10  # quota of all the other endpoints
+KITE_LTP_BLOCK_SIZE = 1000  # maximum instruments in one ltp request
+KITE_QUOTE_BLOCK_SIZE = 500  # maximum instruments in one quote request
+KITE_MAX_WORKERS = 4  # threads used to call the kite api concurrently
+TRAINING_WORKERS = 4  # processes generating the training data of the stocks, 1 generates it in this process
+
+DEPTH_SNAPSHOT_TTL = 15  # seconds for which the depth fetched in a tick is reused
+# stocks whose last daily candle ends a bearish pattern are screened out before the market opens and never quoted.
+# it is a filter of its own, whether_buy checks the pattern ending at the intraday bar and could still buy them
+DAILY_PATTERN_SCREEN = False
 
 # expected returns are set in this section
 DELIVERY_INITIAL_RETURN = 0.01
@@ -60,6 +78,29 @@ YFINANCE_EXTENSION = "NS"
 STOCK_NAME_PATH = "/temp/INDEX_NSE.csv"
 MARKET_CAP_HEADER_NAME = 'Market Capitalisation'
 
+# series in which each symbol trades, resolved once a day e.g. RELIANCE or 20MICRONS-BE
+SYMBOL_SERIES_PATH = "/temp/symbol_series.json"
+
+# daily and intraday bars of yfinance cached per ticker and interval, only the bars after the cached ones are downloaded
+PRICE_CACHE_PATH = "/temp/price_cache"
+PRICE_CACHE_MAX_AGE = 300  # seconds for which the cached bars are used without checking for newer ones
+# relative difference between a cached open and the downloaded one above which the history has been adjusted,
+# e.g. for a split or a dividend, and the whole period is downloaded again
+PRICE_CACHE_ADJUSTMENT_TOLERANCE = 1e-4
+
+# prices of each tracked stock, one append only file per stock
+TICK_STORE_PATH = "/temp/ticks"
+
+# binary log of the intraday prices, written in the background and used to reload the prices on a restart
+SNAPSHOT_PATH = "/temp/snapshots"
+SNAPSHOT_FLUSH_TICKS = 5  # ticks after which the log is written
+SNAPSHOT_FLUSH_SECONDS = 120  # seconds after which the log is written even if there are fewer ticks
+EXPORT_PREDICTION_CSV = False  # also export the intraday prices to temp/prediction_df.csv on every write
+
+# training data of each universe and shift, one version per training date with a memory mappable file per column
+FEATURE_STORE_PATH = "/temp/feature_store"
+FEATURE_STORE_VERSIONS = 5  # latest versions kept of each universe and shift
+
 
 def get_allocation():
     global MAXIMUM_ALLOCATION
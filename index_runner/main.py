@@ -1,21 +1,24 @@
+# imported first so that the report of the startup includes the imports of main
+from utils.startup_timer import startup_timer
+
 import asyncio
 import os
-import pickle
 from asyncio import sleep
 from datetime import datetime
+from time import monotonic
 from logging import Logger
 import sys
-import yfinance as yf
 import pandas as pd
 from kiteconnect.exceptions import InputException
 
-from keras.models import load_model
-
+from constants.enums.request_priority import RequestPriority
 from constants.enums.shift import Shift
 from constants.settings import STOCK_LOWER_PRICE, STOCK_UPPER_PRICE, set_wallet_value, get_allocation, \
     YFINANCE_EXTENSION, TRAINING_DATE, DEBUG, get_wallet_value, START_TIME, SLEEP_INTERVAL, END_TIME, end_process, \
     set_end_process, STOP_BUYING_TIME_MORNING, START_BUYING_TIME_MORNING, STOP_BUYING_TIME_EVENING, \
-    START_BUYING_TIME_EVENING, set_max_stocks, get_max_stocks, CURRENT_STOCK_EXCHANGE, EXPECTED_MINIMUM_MONTHLY_RETURN
+    START_BUYING_TIME_EVENING, set_max_stocks, get_max_stocks, CURRENT_STOCK_EXCHANGE, EXPECTED_MINIMUM_MONTHLY_RETURN, \
+    PREDICTION_WINDOW, SNAPSHOT_PATH, EXPORT_PREDICTION_CSV, DAILY_PATTERN_SCREEN, TODAY, \
+    STOP_LOSS_CHECK_INTERVAL
 from constants.global_contexts import set_access_token, kite_context
 from models.account import Account
 from models.db_models.db_functions import retrieve_all_services, find_by_name
@@ -23,13 +26,22 @@ from models.stages.position import Position
 from models.stock_info import StockInfo
 from models.wallet import Wallet
 from utils.financials.checks import increasing_sales, increasing_eps
+from utils.kite_scheduler import kite_scheduler
+from utils import price_cache
 from utils.logger import get_logger
 from utils.tracking_components.fetch_prices import fetch_current_prices
+from utils.tracking_components.price_buffer import PriceRingBuffer, value_at_risk
+from utils.tracking_components.price_feed import PriceFeed
+from utils.tracking_components.snapshot_log import SnapshotLog
+from utils.tracking_components.tick_store import tick_store
+from utils.tracking_components.depth_snapshot import depth_snapshot
+from utils.tracking_components.dense_model import load_dense_model
+from utils.tracking_components.pattern_screen import screen_universe
 from utils.tracking_components.select_stocks import predict_running_df
-from utils.tracking_components.training_components.trained_model import train_model
 from utils.tracking_components.verify_symbols import get_correct_symbol
 
 logger: Logger = get_logger(__name__)
+startup_timer.mark("imports")
 
 # args = sys.argv[1].split(":")
 # access_token = str(args[0])
@@ -44,6 +56,34 @@ set_access_token(access_token=access_token)
 set_wallet_value(amount=wallet_value_params)
 
 
+# exit price of each position at which the feed ended the last sleep, so that a position which could not be sold
+# does not end every sleep till its exit price moves
+exit_alerts: dict[str, float] = {}
+
+
+async def sleep_till_exit(seconds: float, positions: dict[str, Position], price_feed: PriceFeed):
+    """
+    sleeps till the next iteration, checking the ticks of the positions every STOP_LOSS_CHECK_INTERVAL so that a
+    position whose price falls below its exit price is sold in the next iteration instead of after the whole interval
+    :param seconds: seconds till the next iteration
+    :param positions: positions of the account
+    :param price_feed: websocket prices, the positions without a price in it are only checked by the iteration
+    :return: None
+    """
+    deadline = monotonic() + seconds
+    while (remaining := deadline - monotonic()) > 0:
+        await sleep(min(STOP_LOSS_CHECK_INTERVAL, remaining))
+        for position_name, position in list(positions.items()):
+            price, exit_price = price_feed.last_price(position_name), position.exit_price()
+            if price is None or exit_price is None or price >= exit_price:
+                continue
+            if exit_alerts.get(position_name) == exit_price:
+                continue
+            exit_alerts[position_name] = exit_price
+            logger.info(f"{position_name} ticked at {price} below its exit price {exit_price}, checking the positions")
+            return
+
+
 async def background_task():
     """
         all the tasks mentioned here will be running in the background
@@ -62,6 +102,10 @@ async def background_task():
     logger.info(f"listed indices : {obtained_stock_list}")
 
     not_loaded = True
+
+    # websocket feed keeping the last traded price of all the filtered stocks
+    price_feed = PriceFeed()
+
     # filtered stocks contains all stocks in prediction_df with .NS removed
     filtered_stocks, selected_long_stocks, selected_short_stocks = [], [], []
 
@@ -83,12 +127,13 @@ async def background_task():
 
     # load all holdings from the database
     await account.load_holdings()
+    startup_timer.mark("symbols and holdings")
 
     # loading day based price df from yahoo finance
     day_based_price_df = None
 
     try:
-        day_based_price_df = yf.download(tickers=[f"{st}.{YFINANCE_EXTENSION}"for st in obtained_stock_list], period='1y', interval='1d')[['Close', 'High', 'Low', 'Open']]
+        day_based_price_df = price_cache.download(tickers=[f"{st}.{YFINANCE_EXTENSION}"for st in obtained_stock_list], period='1y', interval='1d')[['Close', 'High', 'Low', 'Open']]
         day_based_price_df = day_based_price_df.ffill().bfill()
         day_based_price_df.index = pd.to_datetime(day_based_price_df.index)
         day_based_price_df = day_based_price_df.loc[:str(TRAINING_DATE.date())]
@@ -100,10 +145,11 @@ async def background_task():
             day_based_price_df = pd.read_csv(f"temp/day_based_price_df.csv", index_col=0)
         except:
             day_based_price_df = None
+    startup_timer.mark("daily prices")
 
     # loading day based price df from yahoo finance
     try:
-        prediction_df = yf.download(tickers=[f"{st}.{YFINANCE_EXTENSION}"for st in obtained_stock_list], period='5d', interval='1m')['Close']
+        prediction_df = price_cache.download(tickers=[f"{st}.{YFINANCE_EXTENSION}"for st in obtained_stock_list], period='5d', interval='1m')['Close']
         prediction_df = prediction_df.ffill().bfill()
         prediction_df.index = pd.to_datetime(prediction_df.index)
         prediction_df = prediction_df.loc[:str(TRAINING_DATE.date())]
@@ -114,6 +160,7 @@ async def background_task():
             prediction_df = pd.read_csv(f"temp/prediction_df.csv", index_col=0)
         except:
             prediction_df = None
+    startup_timer.mark("intraday prices")
 
     # eliminating uncommon stocks
     stocks_present = []
@@ -135,6 +182,19 @@ async def background_task():
 
     logger.info(prediction_df)
 
+    # intraday prices of all the stocks, appended every interval
+    # on a restart the prices already collected today are reloaded from the snapshot log, named by the trading day
+    snapshot_log = SnapshotLog(os.getcwd() + SNAPSHOT_PATH + f"/prediction_{TODAY.date()}.bin",
+                               export_path="temp/prediction_df.csv" if EXPORT_PREDICTION_CSV else None)
+    prediction_buffer = snapshot_log.load(PREDICTION_WINDOW)
+    if prediction_buffer is not None:
+        logger.info(f"intraday prices reloaded from the snapshot: {len(prediction_buffer)} rows")
+    elif prediction_df is not None:
+        prediction_buffer = PriceRingBuffer.from_frame(prediction_df, PREDICTION_WINDOW)
+        snapshot_log.record(prediction_buffer)
+    snapshot_log.start(PREDICTION_WINDOW)
+    startup_timer.mark("snapshot")
+
     # loading all holdings and stocks into a list to compare what has been sold at the end
     # these are just used for verification at the end
 
@@ -152,34 +212,39 @@ async def background_task():
 
     blacklisted_stocks = []
 
+    # the daily candles of all the stocks are scanned together, the ones ruled out are not quoted during the day
+    screened_out_stocks: set[str] = set()
+    if DAILY_PATTERN_SCREEN and day_based_price_df is not None:
+        try:
+            daily_screen = screen_universe(day_based_price_df)
+            screened_out_stocks.update(daily_screen.index[~daily_screen["eligible"]])
+        except:
+            logger.exception("error while screening the daily candles, no stock is ruled out")
+    startup_timer.mark("pattern screen")
+
     """
         model and parameter setup
     """
 
     # model to predict morning stocks
 
-    model_morning = load_model(os.getcwd() + "/temp/DNN_model_morning.h5")
-
-    logger.info(f"model loaded for morning: {model_morning}")
+    # the models are the numpy exports of the keras models, which carry their mu and sigma
 
-    params_morning = pickle.load(open(os.getcwd() + "/temp/params_morning.pkl", "rb"))
+    model_morning = load_dense_model(Shift.MORNING)
 
-    logger.info(f"mu and sigma loaded for morning: {params_morning}")
+    logger.info(f"model loaded for morning: {model_morning}")
 
     # model to predict evening stocks
 
-    model_evening = load_model(os.getcwd() + "/temp/DNN_model_evening.h5")
+    model_evening = load_dense_model(Shift.EVENING)
 
     logger.info(f"model loaded for evening: {model_evening}")
 
-    params_evening = pickle.load(open(os.getcwd() + "/temp/params_evening.pkl", "rb"))
-
-    logger.info(f"mu and sigma loaded for evening: {params_evening}")
-
-    # predict_stocks = predict_running_df(day_based_price_df['Close'], model, params)
-
-    predict_stocks_morning = predict_running_df(day_based_price_df['Open'], model_morning, params_morning)
-    predict_stocks_evening = predict_running_df(day_based_price_df['Close'], model_evening, params_evening)
+    predict_stocks_morning = predict_running_df(day_based_price_df['Open'], model_morning)
+    predict_stocks_evening = predict_running_df(day_based_price_df['Close'], model_evening)
+    startup_timer.mark("models")
+    # the runner predicts with the numpy models, so loading keras or tensorflow is a regression
+    startup_timer.report(unexpected=["tensorflow", "keras"])
 
     # this part will loop till the trading times end
     current_time = datetime.now()
@@ -189,7 +254,7 @@ async def background_task():
 
         # if the trading has not started then iterate every 1 sec else iterate every 30 sec
         if START_TIME < current_time:
-            await sleep(SLEEP_INTERVAL)
+            await sleep_till_exit(SLEEP_INTERVAL, account.positions, price_feed)
         else:
             await sleep(1)
 
@@ -197,11 +262,15 @@ async def background_task():
         try:
 
             if not_loaded and current_time >= START_TIME:
-                filtered_stocks = [i[:-3] for i in list(prediction_df.columns)]
+                filtered_stocks = [i[:-3] for i in prediction_buffer.columns]
 
                 logger.info(f"list of filtered stocks: {filtered_stocks}")
                 not_loaded = False
 
+                if not DEBUG:
+                    # the positions carried from the earlier days are subscribed too for their stop loss
+                    price_feed.start(filtered_stocks + [st for st in account.positions if st not in filtered_stocks])
+
             if end_process():
                 break
 
@@ -210,33 +279,33 @@ async def background_task():
             """
 
             if START_TIME < current_time:
-                # update the prediction_df after every interval
-                new_cost_df = await fetch_current_prices(filtered_stocks)
+                # update the prediction buffer after every interval
+                new_cost_df = None if DEBUG else price_feed.current_prices(filtered_stocks)
+                # the stocks without a recent tick are polled, all of them while the ticker is disconnected
+                stale_stocks = filtered_stocks if DEBUG else price_feed.stale_symbols(filtered_stocks)
+                if stale_stocks:
+                    polled_df = await fetch_current_prices(stale_stocks)
+                    if polled_df is not None:
+                        new_cost_df = polled_df if new_cost_df is None else pd.concat([new_cost_df, polled_df], axis=1)
                 # the if condition is for the debug process
                 if new_cost_df is None:
                     set_end_process(True)
                 else:
-                    prediction_df = pd.concat([prediction_df, new_cost_df], ignore_index=True)
-                    prediction_df = prediction_df.bfill().ffill()
-                    prediction_df.dropna(axis=1, inplace=True)
-                    prediction_df = prediction_df[[col for col in list(prediction_df.columns) if '-BE' not in col]]
-                    prediction_df = prediction_df.iloc[-2000:]
-                    prediction_df = prediction_df.reset_index(drop=True)
-                    price_filter = list(prediction_df.iloc[-1][prediction_df.iloc[-1] < 30].index)
-                    prediction_df = prediction_df[price_filter]
-                    prediction_df.to_csv(f"temp/prediction_df.csv")
+                    prediction_buffer.append(new_cost_df)
+                    prediction_buffer.keep([col for col in prediction_buffer.columns if '-BE' not in col])
+                    price_filter = [col for col, price in zip(prediction_buffer.columns, prediction_buffer.last()) if price < 30]
+                    prediction_buffer.keep(price_filter)
+                    snapshot_log.record(prediction_buffer)
 
                 # # listing those stocks first with less VaR
-                data_resampled = prediction_df.iloc[::60, :]
-                log_returns = data_resampled.pct_change()
-                VaR_95 = log_returns.quantile(0.005, interpolation='lower')
+                VaR_95 = value_at_risk(prediction_buffer.window(), prediction_buffer.columns, step=60, quantile=0.005)
 
                 stock_list = []
 
                 if STOP_BUYING_TIME_MORNING > current_time > START_BUYING_TIME_MORNING:
-                    stock_list = predict_stocks_morning(prediction_df, Shift.MORNING)
+                    stock_list = predict_stocks_morning(prediction_buffer.frame(), Shift.MORNING)
                 elif STOP_BUYING_TIME_EVENING > current_time > START_BUYING_TIME_EVENING:
-                    stock_list = predict_stocks_evening(prediction_df, Shift.EVENING)
+                    stock_list = predict_stocks_evening(prediction_buffer.frame(), Shift.EVENING)
 
                 predicted_stocks = list(VaR_95[stock_list].sort_values(ascending=False).index)
 
@@ -248,11 +317,26 @@ async def background_task():
 
                 logger.info(f"list of the stocks to track: {account.stocks_to_track.keys()}")
 
+                # depth of every stock which can be quoted in this tick is fetched together,
+                # all the get_quote calls of this tick are served from it
+                if not DEBUG:
+                    stocks_to_enter = []
+                    if (STOP_BUYING_TIME_MORNING > current_time > START_BUYING_TIME_MORNING) or (STOP_BUYING_TIME_EVENING > current_time > START_BUYING_TIME_EVENING):
+                        stocks_to_enter = [st for st in selected_long_stocks
+                                           if st not in blacklisted_stocks and st not in screened_out_stocks]
+                    await asyncio.gather(
+                        depth_snapshot.refresh(list(account.positions.keys()), priority=RequestPriority.EXIT_QUOTE),
+                        depth_snapshot.refresh(
+                            [st for st in list(account.stocks_to_track.keys()) + stocks_to_enter if st not in account.positions],
+                            priority=RequestPriority.ENTRY_QUOTE
+                        )
+                    )
+
                 if (STOP_BUYING_TIME_MORNING > current_time > START_BUYING_TIME_MORNING) or (STOP_BUYING_TIME_EVENING > current_time > START_BUYING_TIME_EVENING):
 
                     # selecting stock which meets the criteria
                     for stock_col in selected_long_stocks:
-                        if stock_col not in blacklisted_stocks:
+                        if stock_col not in blacklisted_stocks and stock_col not in screened_out_stocks:
                             # available cash keeps on changing so max_stocks keeps on changing
                             # the stock will be added if it is added for the first time
                             set_max_stocks(int(account.available_cash/get_allocation()))
@@ -273,14 +357,11 @@ async def background_task():
                                 # even if it may seem that allocation is reduced when bought, actual change is while adding the
                                 # stock in stocks to track
                                 account.available_cash -= get_allocation()
-                                stock_df = prediction_df[[f"{stock_col}.{YFINANCE_EXTENSION}"]]
-                                stock_df.reset_index(inplace=True, drop=True)
-                                stock_df = stock_df[[f"{stock_col}.{YFINANCE_EXTENSION}"]].bfill().ffill()
-                                stock_df.columns = ['price']
-                                stock_df.to_csv(f"temp/{stock_col}.csv")
+                                stock_prices = prediction_buffer.column(f"{stock_col}.{YFINANCE_EXTENSION}")
+                                tick_store.write(stock_col, stock_prices)
 
                                 logger.info("whether actually the stock df has all the data or not")
-                                logger.info(f"{stock_col}: {stock_df.shape}")
+                                logger.info(f"{stock_col}: {stock_prices.shape}")
 
                 """
                     update price for all the stocks which are being tracked
@@ -320,14 +401,14 @@ async def background_task():
                             # if its in holding then fund is added next day else for position its added same day
                             if position.stock.number_of_days == 1:
                                 account.available_cash += get_allocation()
-                            os.remove(os.getcwd() + f"/temp/{position_name}.csv")
+                            tick_store.remove(position_name)
                             today_profit += float(account.stocks_to_track[position_name].wallet)
                             positions_to_delete.append(position_name)
 
                         case "SELL_LOSS":
                             logger.info(f" loss -->sell {position.stock.stock_name} at {position.stock.latest_price}")
                             positions_to_delete.append(position_name)
-                            os.remove(os.getcwd() + f"/temp/{position_name}.csv")
+                            tick_store.remove(position_name)
                             if position.stock.number_of_days == 1:
                                 account.available_cash += get_allocation()
                             today_profit += float(account.stocks_to_track[position_name].wallet)
@@ -343,6 +424,11 @@ async def background_task():
         except:
             logger.exception("Kite error may have happened")
 
+    price_feed.stop()
+    snapshot_log.stop()
+
+    logger.info(f"kite requests: {kite_scheduler.metrics()}")
+
     # sell all the stocks which has trigger and is not None
 
     positions_to_delete = []  # this is needed or else it will alter the length during loop
@@ -385,7 +471,7 @@ async def background_task():
         del account.positions[position_name]
         if account.stocks_to_track[position_name].wallet > 0:
             del account.stocks_to_track[position_name]  # delete from stocks to track
-            os.remove(os.getcwd() + f"/temp/{position_name}.csv")
+            tick_store.remove(position_name)
 
     sorted_wallet_list = list(wallet_order.keys())
 
@@ -418,7 +504,7 @@ async def background_task():
 
     for position_name in positions_to_delete:
         del account.positions[position_name]
-        os.remove(os.getcwd() + f"/temp/{position_name}.csv")
+        tick_store.remove(position_name)
 
     """
         END OF DAY ACTIVITIES
@@ -453,6 +539,11 @@ async def background_task():
 
 
 async def training():
+    # tensorflow is only loaded when training
+    from utils.tracking_components.training_components.trained_model import train_model
+    startup_timer.mark("training imports")
+    startup_timer.report()
+
     obtained_stock_list = await get_correct_symbol(lower_price=STOCK_LOWER_PRICE, higher_price=STOCK_UPPER_PRICE)
     logger.info(obtained_stock_list)
     train_model(obtained_stock_list, shift=Shift.MORNING)
@@ -1,4 +1,3 @@
-import re
 from datetime import datetime
 from logging import Logger
 from time import sleep
@@ -13,23 +12,20 @@ from dateutil.rrule import rrule, WEEKLY, MO, TU, WE, TH, FR
 from constants.enums.shift import Shift
 from utils.exclude_dates import load_holidays
 
-from constants.global_contexts import kite_context
+from constants.enums.request_priority import RequestPriority
 from constants.settings import DEBUG, set_end_process, TODAY, CURRENT_STOCK_EXCHANGE
 from models.db_models.object_models import get_save_to_db, get_delete_from_db, get_update_in_db
 from models.costs.delivery_trading_cost import DeliveryTransactionCost
 from models.costs.intraday_trading_cost import IntradayTransactionCost
-from utils.indicators.kaufman_indicator import kaufman_indicator
-from utils.indicators.candlestick.patterns.bullish_engulfing import BullishEngulfing
-from utils.indicators.candlestick.patterns.bullish_harami import BullishHarami
-from utils.indicators.candlestick.patterns.morning_star import MorningStar
-from utils.indicators.candlestick.patterns.hammer import Hammer
-from utils.indicators.candlestick.patterns.inverted_hammer import InvertedHammer
-
-from utils.indicators.candlestick.patterns.bearish_engulfing import BearishEngulfing
-from utils.indicators.candlestick.patterns.bearish_harami import BearishHarami
-from utils.indicators.candlestick.patterns.evening_star import EveningStar
+from utils.depth_walk import fill_price_for_quantity, fill_for_amount
+from utils.indicators.streaming_kaufman import KaufmanTrend
 
 from utils.logger import get_logger
+from utils.kite_scheduler import kite_scheduler
+from utils.tracking_components.bar_builder import BarBuilder
+from utils.tracking_components.depth_snapshot import depth_snapshot
+from utils.tracking_components.pattern_screen import pattern_scanner, BULLISH_PATTERNS, BEARISH_PATTERNS
+from utils.tracking_components.tick_store import tick_store
 from constants.settings import GENERATOR_URL, MAXIMUM_ALLOCATION
 
 logger: Logger = get_logger(__name__)
@@ -58,7 +54,9 @@ class StockInfo:
     COLLECTION: str = field(default="index_stock_dbg" if DEBUG else "index_stock", init=False)
     latest_price: float = field(default=None, init=False)
     created_at: datetime = field(default=TODAY)
-    __result_stock_df: pd.DataFrame | None = field(default=None, init=False)
+    __price_count: int = field(default=0, init=False)  # number of prices logged in the tick store
+    __trend: KaufmanTrend | None = field(default=None, init=False)
+    __bars: dict[Shift, BarBuilder] = field(default_factory=dict, init=False)
     schema: dict = field(default_factory=get_schema, init=False)
     save_to_db: Callable = field(default=None, init=False)
     delete_from_db: Callable = field(default=None, init=False)
@@ -78,11 +76,20 @@ class StockInfo:
 
     @property
     def get_quote(self):
+        """
+            returns the depth from the snapshot of the tick, if it is not present then it is fetched for this stock
+        """
+        depth = depth_snapshot.get(self.stock_name, self.exchange)
+        if depth is not None:
+            return depth
         retries = 0
         while retries < 4:
             try:
-                return kite_context.quote([f"{self.exchange}:{self.stock_name}"])[f"{self.exchange}:{self.stock_name}"][
-                    "depth"]
+                # a stock in position is quoted to exit from it
+                priority = RequestPriority.EXIT_QUOTE if self.in_position else RequestPriority.ENTRY_QUOTE
+                quote = kite_scheduler.quote([f"{self.exchange}:{self.stock_name}"], priority=priority)
+                depth_snapshot.update(quote)
+                return quote[f"{self.exchange}:{self.stock_name}"]["depth"]
             except:
                 sleep(1)
                 retries += 1
@@ -107,15 +114,7 @@ class StockInfo:
                         orders: list = quote["buy"]
                     else:
                         orders: list = quote["sell"]
-                    accumulated, quantity = 0, 0
-                    for item in orders:
-                        for order_no in range(1, item["orders"] + 1):
-                            for _ in range(1, item["quantity"] + 1):
-                                if quantity + 1 > self.quantity:
-                                    return accumulated / quantity
-                                accumulated += item["price"]
-                                quantity += 1
-                    return None
+                    return fill_price_for_quantity(orders, self.quantity)
 
             except:
                 sleep(1)
@@ -182,17 +181,6 @@ class StockInfo:
     def buy_parameters(self):
         amount: float = MAXIMUM_ALLOCATION
 
-        def get_quantity_and_price(s_orders):
-            accumulated, quantity = 0, 0
-            for item in s_orders:
-                for order_no in range(1, item["orders"] + 1):
-                    for _ in range(1, item["quantity"] + 1):
-                        if accumulated + item["price"] > amount:
-                            return quantity, accumulated / quantity
-                        accumulated += item["price"]
-                        quantity += 1
-            return quantity, accumulated / quantity
-
         if DEBUG:
             if self.latest_price:
                 self.quantity, price = int(amount / self.latest_price), self.latest_price
@@ -201,79 +189,71 @@ class StockInfo:
         else:
             quote: dict = self.get_quote
             sell_orders: list = quote["sell"]
-            self.quantity, price = get_quantity_and_price(sell_orders)
+            self.quantity, price = fill_for_amount(sell_orders, amount)
         return self.quantity, price
 
     def update_stock_df(self, current_price: float):
         """
-        This function updates the csv file which holds the price every 30 sec
+        This function appends the price to the tick store which holds the price every 30 sec.
+        The prices logged before the stock was loaded are read once, after that only the new price is fed to the
+        indicators so a tick does not depend on the length of the history.
         :param current_price:
         :return: None
         """
-        try:
-            self.__result_stock_df = pd.read_csv(f"temp/{self.stock_name}.csv")
-            self.__result_stock_df.drop(self.__result_stock_df.columns[0], axis=1, inplace=True)
-        except FileNotFoundError:
-            logger.info(f"file not found while updating stock df")
-            self.__result_stock_df = None
-        stock_df = pd.DataFrame({"price": [current_price]})
-        if self.__result_stock_df is not None:
-            self.__result_stock_df = pd.concat([self.__result_stock_df, stock_df], ignore_index=True)
-        else:
-            self.__result_stock_df = stock_df
-        self.__result_stock_df.to_csv(f"temp/{self.stock_name}.csv")
-        self.__result_stock_df = self.__result_stock_df.bfill().ffill()
-        self.__result_stock_df.dropna(axis=1, inplace=True)
+        tick_store.append(self.stock_name, current_price)
+
+        if self.__price_count == 0:
+            # the missing prices are filled as before, until a price is present they are read again on the next tick
+            prices = pd.Series(tick_store.read(self.stock_name), dtype="float64").bfill().ffill()
+            if prices.notna().all():
+                self.__price_count = len(prices)
+                self.update_trend(prices.to_numpy())
+                self.update_bars(prices.to_numpy())
+            return
+
+        self.__price_count += 1
+        self.__trend.update(current_price)
+        tick_store.save_state(self.stock_name, self.__trend.to_dict())
+        for bars in self.__bars.values():
+            bars.update(current_price)
+
+    def update_trend(self, prices):
+        """
+        Feeds the new prices to the kaufman line and its ema, so only the prices since the last tick are computed.
+        The state is restored from the checkpoint of the tick store when the stock is loaded again.
+
+        :param prices: all the prices of the stock
+        :return: None
+        """
+        if self.__trend is None:
+            state = tick_store.load_state(self.stock_name)
+            self.__trend = KaufmanTrend.from_dict(state) if state is not None else KaufmanTrend()
+        if self.__trend.count > len(prices):
+            # the prices have been replaced since the state was saved
+            self.__trend = KaufmanTrend()
+        self.__trend.sync(prices)
+        tick_store.save_state(self.stock_name, self.__trend.to_dict())
+
+    def update_bars(self, prices):
+        """
+        Feeds the new prices to the bars of each shift. In the morning a bar is the latest 5 prices so that a check
+        is made on whether the trend actually reversed, in the evening it is all the prices.
+
+        :param prices: all the prices of the stock
+        :return: None
+        """
+        if not self.__bars or self.__bars[Shift.MORNING].count > len(prices):
+            self.__bars = {
+                Shift.MORNING: BarBuilder(ticks=5, sliding=True),
+                Shift.EVENING: BarBuilder()
+            }
+        for bars in self.__bars.values():
+            bars.sync(prices)
 
     def get_ohlc(self, shift: Shift):
-        data = self.__result_stock_df.copy()
-        # since a check is needed to verify whether the trend actually reversed or not
-        window = 0
-        if shift == Shift.MORNING:
-            window = 5
-        elif shift == Shift.EVENING:
-            window = len(data)
-
-        ohlcv_data = pd.DataFrame()
-
-        if shift == Shift.MORNING:
-            # Apply a rolling window of 15 minutes
-            rolling_data = data['price'].rolling(window=window)
-            # Calculate Open, Close, High, and Low prices for each window
-            open_price = rolling_data.apply(lambda x: x.iloc[0] if len(x) == window else None)
-            close_price = rolling_data.apply(lambda x: x.iloc[-1] if len(x) == window else None)
-            high_price = rolling_data.max()
-            low_price = rolling_data.min()
-
-            # Create a new DataFrame with these values
-            ohlcv_data = pd.DataFrame({
-                "Open": open_price,
-                "Close": close_price,
-                "High": high_price,
-                "Low": low_price
-            })
-            # logger.info(f"ohlc_data: {ohlcv_data}")
-
-        if shift == Shift.EVENING:
-
-            rolling_data = data['price'].rolling(window=window)
-
-            # Calculate Open, Close, High, and Low prices for each window
-            open_price = rolling_data.apply(lambda x: x.iloc[0] if len(x) == window else None)
-            close_price = rolling_data.apply(lambda x: x.iloc[-1] if len(x) == window else None)
-            high_price = rolling_data.max()
-            low_price = rolling_data.min()
-
-            # Create a new DataFrame with these values
-            ohlcv_data = pd.DataFrame({
-                "Open": open_price,
-                "Close": close_price,
-                "High": high_price,
-                "Low": low_price
-            })
-
-        # Drop any rows with NaN values which occur at the start of the dataset
-        return ohlcv_data.dropna()
+        if shift not in self.__bars:
+            return pd.DataFrame()
+        return self.__bars[shift].frame()
 
     def whether_buy(self, day_based_df, shift: Shift) -> bool:
         """
@@ -285,11 +265,11 @@ class StockInfo:
         """
 
         logger.info(f"to check whether this function is entered or not")
-        logger.info(f"stock df size {self.__result_stock_df}")
+        logger.info(f"stock df size {self.__price_count}")
 
         multiindex_columns = day_based_df.columns
 
-        if self.__result_stock_df is None or self.__result_stock_df.shape[0] < 15:
+        if self.__trend is None or self.__price_count < 15:
             return False
 
         default_ohlc = ['Open', 'High', 'Low', 'Close']
@@ -303,59 +283,23 @@ class StockInfo:
 
         ohlc_data = pd.concat([d, ohlc_data.iloc[-1:]], ignore_index=True)
 
-        ohlc_data_yes = ohlc_data.copy()
-        ohlc_data_no = ohlc_data.copy()
-
-        # if shift == Shift.EVENING:
-        candl = BullishEngulfing(target='pattern0')
-        ohlc_data_yes = candl.has_pattern(ohlc_data_yes, default_ohlc, False)
-
-        candl = BullishHarami(target='pattern1')
-        ohlc_data_yes = candl.has_pattern(ohlc_data_yes, default_ohlc, False)
-
-        candl = MorningStar(target='pattern2')
-        ohlc_data_yes = candl.has_pattern(ohlc_data_yes, default_ohlc, False)
-
-        candl = Hammer(target='pattern4')
-        ohlc_data_yes = candl.has_pattern(ohlc_data_yes, default_ohlc, False)
-
-        candl = InvertedHammer(target='pattern5')
-        ohlc_data_yes = candl.has_pattern(ohlc_data_yes, default_ohlc, False)
-        # if shift == Shift.MORNING:
-        candl = BearishEngulfing(target='pattern0')
-        ohlc_data_no = candl.has_pattern(ohlc_data_no, default_ohlc, False)
-
-        candl = BearishHarami(target='pattern1')
-        ohlc_data_no = candl.has_pattern(ohlc_data_no, default_ohlc, False)
-
-        candl = EveningStar(target='pattern2')
-        ohlc_data_no = candl.has_pattern(ohlc_data_no, default_ohlc, False)
-
-        regex = re.compile('pattern', re.IGNORECASE)
-
-        # Filter columns where the column name matches the regex pattern
-        matching_columns_yes = [col for col in ohlc_data_yes.columns if regex.search(col)]
-        matching_columns_no = [col for col in ohlc_data_no.columns if regex.search(col)]
-
-        # if True in list(ohlc_data[matching_columns].iloc[-1]):
-        #     logger.info("found")
+        # bits of the patterns ending at the latest candle, only the candles it needs are checked
+        patterns = int(pattern_scanner.scan(ohlc_data, default_ohlc, last_n=1)[-1])
+        bullish = bool(patterns & BULLISH_PATTERNS) and not patterns & BEARISH_PATTERNS
 
-        if self.__result_stock_df.shape[0] > 15:
+        if self.__price_count > 15:
 
-            line_df = self.__result_stock_df.copy()
-            # line_df = line_df[['Close']]
-            line_df.columns = ['price']
-            line_df['line'] = line_df.apply(kaufman_indicator)
-            line_df['ema'] = line_df.line.ewm(span=5, adjust=False).mean()
+            # latest values of the ema of the kaufman line, same as kaufman_indicator followed by ewm(span=5)
+            ema = self.__trend.ema_values
 
             if shift == Shift.EVENING:
-                if True in list(ohlc_data_yes[matching_columns_yes].iloc[-1]) and True not in list(ohlc_data_no[matching_columns_no].iloc[-1]):
+                if bullish:
                     logger.info("entered on whether to buy the stock in evening")
-                    if line_df['ema'].iloc[-3] < line_df['ema'].iloc[-6]:
+                    if ema[-3] < ema[-6]:
                         return True
             if shift == Shift.MORNING:
-                if True in list(ohlc_data_yes[matching_columns_yes].iloc[-1]) and True not in list(ohlc_data_no[matching_columns_no].iloc[-1]):
+                if bullish:
                     logger.info("entered on whether to buy the stock in morning")
-                    if line_df['ema'].iloc[-1] > line_df['ema'].iloc[-3] > line_df['ema'].iloc[-5]:
+                    if ema[-1] > ema[-3] > ema[-5]:
                         return True
         return False
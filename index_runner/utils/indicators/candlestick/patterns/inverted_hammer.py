@@ -5,14 +5,9 @@ class InvertedHammer(CandlestickFinder):
     def __init__(self, target=None):
         super().__init__(self.get_class_name(), 1, target=target)
 
-    def logic(self, idx):
-        candle = self.data.iloc[idx]
+    def logic(self):
+        open, high, low, close = self.candle(0)
 
-        close = candle[self.close_column]
-        open = candle[self.open_column]
-        high = candle[self.high_column]
-        low = candle[self.low_column]
-
-        return (((high - low) > 3 * (open - close)) and
+        return (((high - low) > 3 * (open - close)) &
                 ((high - close) / (.001 + high - low) > 0.6)
-                and ((high - open) / (.001 + high - low) > 0.6))
+                & ((high - open) / (.001 + high - low) > 0.6))
@@ -1,29 +1,14 @@
-from .candlestick_finder import CandlestickFinder
+from .candlestick_finder import CandlestickFinder, maximum
 
 
 class MorningStar(CandlestickFinder):
     def __init__(self, target=None):
         super().__init__(self.get_class_name(), 3, target=target)
 
-    def logic(self, idx):
-        candle = self.data.iloc[idx]
-        prev_candle = self.data.iloc[idx + 1 * self.multi_coeff]
-        b_prev_candle = self.data.iloc[idx + 2 * self.multi_coeff]
-
-        close = candle[self.close_column]
-        open = candle[self.open_column]
-        high = candle[self.high_column]
-        low = candle[self.low_column]
-
-        prev_close = prev_candle[self.close_column]
-        prev_open = prev_candle[self.open_column]
-        prev_high = prev_candle[self.high_column]
-        prev_low = prev_candle[self.low_column]
-
-        b_prev_close = b_prev_candle[self.close_column]
-        b_prev_open = b_prev_candle[self.open_column]
-        b_prev_high = b_prev_candle[self.high_column]
-        b_prev_low = b_prev_candle[self.low_column]
+    def logic(self):
+        open, high, low, close = self.candle(0)
+        prev_open, prev_high, prev_low, prev_close = self.candle(1)
+        b_prev_open, b_prev_high, b_prev_low, b_prev_close = self.candle(2)
 
         # return (b_prev_close < b_prev_open and
         #         abs(b_prev_close - b_prev_open) / (b_prev_high - b_prev_low) >= 0.7 and
@@ -36,5 +21,5 @@ class MorningStar(CandlestickFinder):
         #         prev_open < open and
         #         close > b_prev_close)
 
-        return (max(prev_open, prev_close) < b_prev_close < b_prev_open and
-                close > open > max(prev_open, prev_close))
+        return ((maximum(prev_open, prev_close) < b_prev_close) & (b_prev_close < b_prev_open) &
+                (close > open) & (open > maximum(prev_open, prev_close)))
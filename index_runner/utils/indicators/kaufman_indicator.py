@@ -38,3 +38,44 @@ def kaufman_indicator(price: pd.Series, n=5, pow1=1, pow2=20):
             else:
                 answer[i] = answer[i - 1] + sc[i] * (price[i] - answer[i - 1])
     return answer
+
+
+def kaufman_indicator_batch(prices, n=5, pow1=1, pow2=20):
+    """
+    Kaufman indicator of many symbols together, it gives the same values as kaufman_indicator for each column.
+    The loop runs over the time only and all the symbols are advanced together.
+
+    :param prices: time x symbols matrix or dataframe of the prices
+    :param n: number of observations preceding current value
+    :param pow1: the fastest period
+    :param pow2: the slowest period
+    :return: a time x symbols numpy array with the kama indicator values of each symbol
+    """
+    price = pd.DataFrame(np.asarray(prices, dtype=float))
+    abs_diffx = abs(price - price.shift(1))
+    abs_price_change = np.abs(price - price.shift(n))
+    # the rolling sum of pandas is used so that the volatility is exactly the one of kaufman_indicator
+    vol = abs_diffx.rolling(n).sum()
+    er = abs_price_change / vol
+    fastest_sc, slowest_sc = 2 / (pow1 + 1), 2 / (pow2 + 1)
+
+    sc = ((er * (fastest_sc - slowest_sc) + slowest_sc) ** 2.0).to_numpy()
+    vol, price = vol.to_numpy(), price.to_numpy()
+
+    answer = np.zeros(price.shape)
+    previous = np.zeros(price.shape[1])
+    first_value = np.ones(price.shape[1], dtype=bool)
+    for i in range(price.shape[0]):
+        # if volatility is 0, it turns out to be nan so is considered separately
+        zero_vol = vol[i] == 0
+        # this condition is handled if the sc is np.nan
+        nan_sc = ~zero_vol & (sc[i] != sc[i])
+        # the first value is the actual value to merge the indicator results fast
+        first = ~zero_vol & ~nan_sc & first_value
+        first_value &= ~first
+
+        current = np.where(zero_vol, previous + 1 * (price[i] - previous), previous + sc[i] * (price[i] - previous))
+        current = np.where(first, price[i], current)
+        current[nan_sc] = np.nan
+        answer[i] = previous = current
+    return answer
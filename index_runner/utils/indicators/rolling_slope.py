@@ -0,0 +1,132 @@
+import numpy as np
+
+# rows of daily prices over which the slope features are taken
+SLOPE_WINDOWS = {
+    '6mo': 132,
+    '3mo': 66,
+    '1mo': 22,
+    '5d': 5,
+    '2d': 2
+}
+SLOPE_SHIFTS = 3  # the features are also taken 1 and 2 rows back
+
+
+def rolling_slope(values, window: int) -> np.ndarray:
+    """
+    Slope of the least squares line over each window divided by the value of the line at the start of the window,
+    i.e. polyfit(index, window, 1) normalised as coefficient[0] / (coefficient[0] * index[0] + coefficient[1]).
+    The sums of y and x * y are taken from cumulative sums so that every window costs O(1) for all the columns.
+
+    :param values: prices, one row per day and one column per symbol or a single series
+    :param window: number of rows in a window, at least 2
+    :return: normalised slope of the window ending at each row with the shape of values,
+             nan for the first window - 1 rows and the windows having a nan
+    """
+    values = np.asarray(values, dtype=np.float64)
+    rows = len(values)
+    result = np.full(values.shape, np.nan)
+    if rows < window:
+        return result
+
+    missing = np.isnan(values)
+    # the slope does not change when a constant is taken out of y, the mean keeps the cumulative sums small
+    present = np.maximum((~missing).sum(axis=0), 1)
+    offset = np.where(missing, 0.0, values).sum(axis=0) / present
+    y = np.where(missing, 0.0, values - offset)
+    x = np.arange(rows, dtype=np.float64).reshape((-1,) + (1,) * (values.ndim - 1))
+
+    zero = np.zeros((1,) + values.shape[1:])
+    sum_y = np.concatenate([zero, np.cumsum(y, axis=0)])
+    sum_xy = np.concatenate([zero, np.cumsum(x * y, axis=0)])
+    sum_missing = np.concatenate([zero, np.cumsum(missing, axis=0)])
+
+    # sums over the window ending at each row, x counted from the start of the window
+    window_y = sum_y[window:] - sum_y[:-window]
+    window_xy = sum_xy[window:] - sum_xy[:-window] - x[:rows - window + 1] * window_y
+    sum_x = window * (window - 1) / 2
+    sum_xx = (window - 1) * window * (2 * window - 1) / 6
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = (window * window_xy - sum_x * window_y) / (window * sum_xx - sum_x * sum_x)
+        start = (window_y - slope * sum_x) / window + offset
+        normalised = slope / start
+    normalised[(sum_missing[window:] - sum_missing[:-window]) > 0] = np.nan
+
+    result[window - 1:] = normalised
+    return result
+
+
+def slope_features(values) -> dict[str, np.ndarray]:
+    """
+    :param values: prices, one row per day and one column per symbol or a single series
+    :return: normalised slope of every window and shift keyed by e.g. 6mo_0, in the order of the model inputs,
+             the features of shift s are taken s rows back
+    """
+    values = np.asarray(values, dtype=np.float64)
+    features = {}
+    for shift in range(SLOPE_SHIFTS):
+        shifted = values
+        if shift:
+            shifted = np.full(values.shape, np.nan)
+            shifted[shift:] = values[:-shift]
+        for key, window in SLOPE_WINDOWS.items():
+            features[f"{key}_{shift}"] = rolling_slope(shifted, window)
+    return features
+
+
+class SlopeState:
+    """
+        Sums of the latest daily prices of every window, taken once before the market opens.
+
+        During the day each window is the latest window - 1 daily prices followed by the newest intraday price,
+        so its normalised slope is found in O(1) per symbol by adding the newest price to the sums.
+        It gives the same values as rolling_slope over the daily prices with the newest price appended.
+    """
+
+    def __init__(self, values, windows: dict[str, int] = SLOPE_WINDOWS):
+        """
+        :param values: daily prices, one row per day and one column per symbol
+        :param windows: rows in each window keyed by the name of the feature
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.__values = values
+        missing = np.isnan(values)
+        # the mean of each symbol is taken out of the prices as in rolling_slope
+        present = np.maximum((~missing).sum(axis=0), 1)
+        self.offset = np.where(missing, 0.0, values).sum(axis=0) / present
+        y = np.where(missing, 0.0, values - self.offset)
+
+        self.__sums: dict[str, tuple[int, np.ndarray, np.ndarray, np.ndarray]] = {}
+        for key, window in windows.items():
+            # a window longer than the prices takes all of them, as iloc[-window:] does
+            window = min(window, len(values) + 1)
+            daily = slice(len(values) - window + 1, len(values))
+            x = np.arange(window - 1, dtype=np.float64).reshape((-1,) + (1,) * (values.ndim - 1))
+            self.__sums[key] = (window, y[daily].sum(axis=0), (x * y[daily]).sum(axis=0), missing[daily].sum(axis=0))
+
+    def slopes(self, latest) -> dict[str, np.ndarray]:
+        """
+        :param latest: newest price of every symbol in the order of the columns of the daily prices,
+                       None if there is no newest price in which case the windows end at the last daily price
+        :return: normalised slope of every window for every symbol, nan if its window has a nan
+        """
+        if latest is None:
+            return {key: rolling_slope(self.__values[-window:], len(self.__values[-window:]))[-1]
+                    for key, (window, _, _, _) in self.__sums.items()}
+
+        latest = np.asarray(latest, dtype=np.float64)
+        latest_missing = np.isnan(latest)
+        latest_y = np.where(latest_missing, 0.0, latest - self.offset)
+
+        slopes = {}
+        for key, (window, daily_y, daily_xy, daily_missing) in self.__sums.items():
+            window_y = daily_y + latest_y
+            window_xy = daily_xy + (window - 1) * latest_y
+            sum_x = window * (window - 1) / 2
+            sum_xx = (window - 1) * window * (2 * window - 1) / 6
+            with np.errstate(divide='ignore', invalid='ignore'):
+                slope = (window * window_xy - sum_x * window_y) / (window * sum_xx - sum_x * sum_x)
+                start = (window_y - slope * sum_x) / window + self.offset
+                normalised = slope / start
+            slopes[key] = np.where((daily_missing > 0) | latest_missing, np.nan, normalised)
+        return slopes
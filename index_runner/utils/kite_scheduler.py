@@ -0,0 +1,231 @@
+import itertools
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from logging import Logger
+from queue import PriorityQueue
+from threading import Lock, Thread
+from time import monotonic
+
+from kiteconnect import KiteConnect
+
+from constants.enums.request_priority import RequestPriority
+from constants.global_contexts import kite_context, kite_executor
+from constants.settings import KITE_LTP_BLOCK_SIZE, KITE_QUOTE_BLOCK_SIZE
+from utils.logger import get_logger
+from utils.rate_limiter import TokenBucket, quote_limiter, order_limiter, api_limiter
+
+logger: Logger = get_logger(__name__)
+
+# endpoints which read the data of a list of instruments, an instrument asked for while it is pending is merged
+# into the pending request, with the most instruments a single request of the endpoint takes
+COALESCED_ENDPOINTS = {"quote": KITE_QUOTE_BLOCK_SIZE, "ltp": KITE_LTP_BLOCK_SIZE, "ohlc": KITE_LTP_BLOCK_SIZE}
+
+
+@dataclass
+class KiteRequest:
+    endpoint: str
+    args: tuple
+    kwargs: dict
+    priority: RequestPriority
+    instruments: list[str] | None = None  # instruments of a coalesced request, more are added till it is dispatched
+    future: Future = field(default_factory=Future)
+    submitted_at: float = field(default_factory=monotonic)
+    dispatched: bool = False
+
+
+class KiteScheduler:
+    """
+        Single gateway for all the calls to kite.
+
+        Requests are grouped by the quota they use. Each group has a priority queue served by its own dispatcher
+        thread which waits for the quota and hands the call over to kite_executor, so orders are placed before
+        exit quotes, exit quotes before entry scans and entry scans before the ltp of the universe.
+
+        Read requests are merged by instrument: an instrument which is already pending is served by the pending
+        request, the others are added to the queued request of the endpoint while it has room. So a single stock
+        quote asked for while a batch containing it is pending costs no call of its own.
+    """
+
+    def __init__(self, kite: KiteConnect, limiters: dict[str, TokenBucket], default_limiter: TokenBucket):
+        """
+        :param kite: kite connect object on which the endpoints are called
+        :param limiters: token bucket of each endpoint, endpoints sharing a bucket share a queue
+        :param default_limiter: token bucket used by all the other endpoints
+        """
+        self.kite = kite
+        self.__limiters = limiters
+        self.__default_limiter = default_limiter
+        self.__queues: dict[int, PriorityQueue] = {}
+        self.__pending: dict[tuple[str, str], KiteRequest] = {}  # request of each endpoint and instrument
+        self.__open: dict[str, KiteRequest] = {}  # queued request of each endpoint to which instruments are added
+        self.__metrics: dict[str, dict[str, float]] = {}
+        self.__counter = itertools.count()
+        self.__lock = Lock()
+
+    def __limiter(self, endpoint: str) -> TokenBucket:
+        return self.__limiters.get(endpoint, self.__default_limiter)
+
+    def __queue(self, limiter: TokenBucket) -> PriorityQueue:
+        """
+        returns the queue of the limiter, the dispatcher of the queue is started when it is first used
+        """
+        with self.__lock:
+            if id(limiter) not in self.__queues:
+                self.__queues[id(limiter)] = PriorityQueue()
+                Thread(target=self.__dispatch, args=(self.__queues[id(limiter)], limiter), daemon=True).start()
+            return self.__queues[id(limiter)]
+
+    def __record(self, endpoint: str, metric: str, value: float = 1):
+        with self.__lock:
+            endpoint_metrics = self.__metrics.setdefault(endpoint, {
+                "submitted": 0, "coalesced": 0, "executed": 0, "failed": 0, "queue_seconds": 0, "quota_wait_seconds": 0
+            })
+            endpoint_metrics[metric] += value
+
+    def submit(self, endpoint: str, *args, priority: RequestPriority = RequestPriority.UNIVERSE_LTP,
+               **kwargs) -> Future:
+        """
+        queues a call to the endpoint of kite
+
+        :param endpoint: name of the method of KiteConnect e.g. quote, ltp, place_order
+        :param priority: priority of the request
+        :return: future which holds the response of kite, for a coalesced endpoint only the instruments asked for
+        """
+        self.__record(endpoint, "submitted")
+
+        if endpoint in COALESCED_ENDPOINTS and not kwargs and len(args) == 1 and isinstance(args[0], list) and args[0]:
+            return self.__submit_instruments(endpoint, args[0], priority)
+
+        request = KiteRequest(endpoint=endpoint, args=args, kwargs=kwargs, priority=priority)
+        self.__queue(self.__limiter(endpoint)).put((priority.value, next(self.__counter), request))
+        return request.future
+
+    def __submit_instruments(self, endpoint: str, instruments: list[str], priority: RequestPriority) -> Future:
+        """
+        serves every instrument from the request of the endpoint which already has it, else adds it to the queued
+        request of the endpoint or to a new one
+        """
+        requests: dict[str, KiteRequest] = {}  # request serving each instrument
+        created, requeue = False, []
+        with self.__lock:
+            for instrument in dict.fromkeys(instruments):
+                request = self.__pending.get((endpoint, instrument))
+                if request is None:
+                    request = self.__open.get(endpoint)
+                    if request is None or len(request.instruments) >= COALESCED_ENDPOINTS[endpoint]:
+                        request = KiteRequest(endpoint=endpoint, args=(), kwargs={}, priority=priority, instruments=[])
+                        # the list is sent as it is when the request is executed, with every instrument added till then
+                        request.args = (request.instruments,)
+                        self.__open[endpoint] = request
+                        created = True
+                        requeue.append(request)
+                    request.instruments.append(instrument)
+                    self.__pending[(endpoint, instrument)] = request
+                requests[instrument] = request
+
+            # a request with a higher priority pulls the pending ones ahead, the older entries are skipped later
+            for request in {id(request): request for request in requests.values()}.values():
+                if priority.value < request.priority.value and not request.dispatched:
+                    request.priority = priority
+                    requeue.append(request)
+
+        if not created:
+            self.__record(endpoint, "coalesced")
+        for request in requeue:
+            self.__queue(self.__limiter(endpoint)).put((request.priority.value, next(self.__counter), request))
+        return self.__select(requests)
+
+    @staticmethod
+    def __select(requests: dict[str, KiteRequest]) -> Future:
+        """
+        :param requests: request serving each instrument
+        :return: future which holds the response of each instrument taken from the response of its request, once
+            all the requests are done
+        """
+        future = Future()
+        distinct = list({id(request): request for request in requests.values()}.values())
+        remaining = [len(distinct)]
+        lock = Lock()
+
+        def done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            try:
+                response = {}
+                for instrument, request in requests.items():
+                    result = request.future.result()
+                    # kite leaves out the instruments it does not know
+                    if instrument in result:
+                        response[instrument] = result[instrument]
+                future.set_result(response)
+            except Exception as e:
+                future.set_exception(e)
+
+        for request in distinct:
+            request.future.add_done_callback(done)
+        return future
+
+    def __dispatch(self, queue: PriorityQueue, limiter: TokenBucket):
+        while True:
+            priority, _, request = queue.get()
+            with self.__lock:
+                # stale entry of a request which was moved ahead or has already been dispatched
+                if request.dispatched or priority != request.priority.value:
+                    continue
+                # no instrument is added once it is dispatched
+                request.dispatched = True
+                if self.__open.get(request.endpoint) is request:
+                    del self.__open[request.endpoint]
+            self.__record(request.endpoint, "queue_seconds", monotonic() - request.submitted_at)
+            self.__record(request.endpoint, "quota_wait_seconds", limiter.acquire())
+            kite_executor.submit(self.__execute, request)
+
+    def __execute(self, request: KiteRequest):
+        try:
+            response = getattr(self.kite, request.endpoint)(*request.args, **request.kwargs)
+            self.__record(request.endpoint, "executed")
+            request.future.set_result(response)
+        except Exception as e:
+            self.__record(request.endpoint, "failed")
+            request.future.set_exception(e)
+        finally:
+            if request.instruments is not None:
+                with self.__lock:
+                    for instrument in request.instruments:
+                        if self.__pending.get((request.endpoint, instrument)) is request:
+                            del self.__pending[(request.endpoint, instrument)]
+
+    def metrics(self) -> dict[str, dict[str, float]]:
+        """
+        :return: per endpoint count of submitted, coalesced, executed and failed requests along with the total
+            seconds spent in the queue and waiting for the quota
+        """
+        with self.__lock:
+            return {endpoint: dict(values) for endpoint, values in self.__metrics.items()}
+
+    def quote(self, instruments: list[str], priority: RequestPriority = RequestPriority.ENTRY_QUOTE) -> dict:
+        return self.submit("quote", instruments, priority=priority).result()
+
+    def ltp(self, instruments: list[str], priority: RequestPriority = RequestPriority.UNIVERSE_LTP) -> dict:
+        return self.submit("ltp", instruments, priority=priority).result()
+
+    def place_order(self, **params):
+        return self.submit("place_order", priority=RequestPriority.ORDER, **params).result()
+
+    def holdings(self) -> list:
+        return self.submit("holdings", priority=RequestPriority.ORDER).result()
+
+    def margins(self) -> dict:
+        return self.submit("margins", priority=RequestPriority.ORDER).result()
+
+    def instruments(self, exchange: str) -> list:
+        return self.submit("instruments", exchange).result()
+
+
+kite_scheduler = KiteScheduler(
+    kite_context,
+    limiters={"quote": quote_limiter, "ltp": quote_limiter, "ohlc": quote_limiter, "place_order": order_limiter},
+    default_limiter=api_limiter
+)
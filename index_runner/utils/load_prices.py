@@ -1,10 +1,10 @@
 from logging import Logger
 
 import pandas as pd
-import yfinance as yf
 
 from constants.settings import YFINANCE_EXTENSION, TRAINING_DATE
 
+from utils import price_cache
 from utils.logger import get_logger
 
 logger: Logger = get_logger(__name__)
@@ -14,7 +14,7 @@ def get_price_df(stock_list):
 
     try:
         yfinance_tickers = [f"{stock}.{YFINANCE_EXTENSION}" for stock in stock_list]
-        price_df = yf.download(tickers=yfinance_tickers, period='1y', interval='1d')["Close"]
+        price_df = price_cache.download(tickers=yfinance_tickers, period='1y', interval='1d')["Close"]
         price_df = price_df.ffill().bfill()
         price_df.index = pd.to_datetime(price_df.index)
         price_df = price_df.loc[:str(TRAINING_DATE.date())]
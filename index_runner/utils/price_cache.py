@@ -0,0 +1,200 @@
+from dataclasses import dataclass
+from logging import Logger
+from os import getcwd, makedirs, path as os_path, replace
+from time import time
+
+import numpy as np
+import pandas as pd
+
+from constants.settings import PRICE_CACHE_PATH, PRICE_CACHE_MAX_AGE, PRICE_CACHE_ADJUSTMENT_TOLERANCE
+from utils.logger import get_logger
+
+logger: Logger = get_logger(__name__)
+
+# calendar days covering each period of yfinance
+PERIOD_DAYS = {'1d': 1, '5d': 7, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366, '2y': 731, '5y': 1827}
+# intraday bars are only kept for the period requested, daily bars are kept for the longest period requested
+INTRADAY_INTERVALS = {'1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h'}
+
+
+@dataclass
+class CachedPrices:
+    frame: pd.DataFrame  # one column per field e.g. Open, Close
+    covered_from: pd.Timestamp  # bars are complete from this day
+    fetched_at: float
+
+
+def cache_path(ticker: str, interval: str) -> str:
+    return getcwd() + PRICE_CACHE_PATH + f"/{interval}/{ticker}.npz"
+
+
+def load_cached(ticker: str, interval: str) -> CachedPrices | None:
+    try:
+        with np.load(cache_path(ticker, interval), allow_pickle=False) as data:
+            index = pd.to_datetime(data['index'], utc=str(data['tz']) != '')
+            if str(data['tz']):
+                index = index.tz_convert(str(data['tz']))
+            index.name = str(data['index_name']) or None
+            frame = pd.DataFrame(data['values'], index=index, columns=list(data['fields']))
+            return CachedPrices(frame, pd.Timestamp(str(data['covered_from'])), float(data['fetched_at']))
+    except FileNotFoundError:
+        return None
+    except:
+        logger.exception(f"discarding the cached prices of {ticker}")
+        return None
+
+
+def save_cached(ticker: str, interval: str, cached: CachedPrices):
+    file_path = cache_path(ticker, interval)
+    makedirs(os_path.dirname(file_path), exist_ok=True)
+    index = cached.frame.index
+    tz = str(index.tz) if index.tz is not None else ''
+    # written to a temporary file first so that a crash never leaves a broken cache
+    with open(file_path + ".tmp", "wb") as file:
+        np.savez(
+            file,
+            index=(index.tz_convert('UTC').tz_localize(None) if tz else index).values.astype('datetime64[ns]'),
+            tz=np.array(tz),
+            index_name=np.array(index.name or ''),
+            fields=np.array(list(cached.frame.columns), dtype=str),
+            values=cached.frame.to_numpy(dtype=np.float64),
+            covered_from=np.array(str(cached.covered_from)),
+            fetched_at=np.array(cached.fetched_at)
+        )
+    replace(file_path + ".tmp", file_path)
+
+
+def since(frame: pd.DataFrame, start: pd.Timestamp) -> pd.DataFrame:
+    """
+    :return: rows of the frame from the start, the start is taken in the timezone of the frame
+    """
+    if frame.index.tz is not None:
+        start = start.tz_localize(frame.index.tz)
+    return frame[frame.index >= start]
+
+
+def adjusted(cached: pd.DataFrame, downloaded: pd.DataFrame) -> bool:
+    """
+    The download starts at the last cached day, so the bars of that day are in both. Only the opens are compared,
+    as the other fields of a bar cached before it closed still change, while an adjustment rescales all of them.
+
+    :return: whether the cached bars are on another basis than the downloaded ones
+    """
+    if 'Open' not in cached.columns or 'Open' not in downloaded.columns:
+        return False
+    common = cached.index.intersection(downloaded.index)
+    cached_open = cached.loc[common, 'Open'].to_numpy(dtype=np.float64)
+    downloaded_open = downloaded.loc[common, 'Open'].to_numpy(dtype=np.float64)
+    present = ~(np.isnan(cached_open) | np.isnan(downloaded_open))
+    return not np.allclose(cached_open[present], downloaded_open[present],
+                           rtol=PRICE_CACHE_ADJUSTMENT_TOLERANCE, atol=0)
+
+
+def fetch(tickers: list[str], interval: str, **kwargs) -> dict[str, pd.DataFrame] | None:
+    """
+    downloads the tickers in one call
+    :return: bars of each ticker which has any data, None if the download failed
+    """
+    # yfinance is only imported when something has to be downloaded
+    import yfinance as yf
+
+    try:
+        downloaded = yf.download(tickers=tickers, interval=interval, **kwargs)
+    except:
+        logger.exception(f"error while downloading {len(tickers)} tickers from yfinance")
+        return None
+    if downloaded is None or downloaded.empty:
+        return {}
+
+    fetched = {}
+    for ticker in tickers:
+        if isinstance(downloaded.columns, pd.MultiIndex):
+            if ticker not in downloaded.columns.get_level_values(1):
+                continue
+            frame = downloaded.xs(ticker, axis=1, level=1)
+        elif len(tickers) == 1:
+            frame = downloaded
+        else:
+            continue
+        frame = frame.dropna(how='all')
+        if not frame.empty:
+            fetched[ticker] = frame
+    return fetched
+
+
+def download(tickers: list[str], period: str = '1y', interval: str = '1d', **kwargs) -> pd.DataFrame:
+    """
+    Same as yf.download(tickers=tickers, period=period, interval=interval) but the bars are cached on disk per ticker
+    and interval. Only the bars after the last cached one are downloaded, a ticker is downloaded for the whole period
+    only if it is not cached for the period or its cached bars were adjusted since, e.g. for a split. If the download
+    fails the cached bars are returned.
+
+    :param tickers: yfinance tickers e.g. RELIANCE.NS
+    :param period: period of yfinance e.g. 1y, 6mo, 5d
+    :param interval: interval of yfinance e.g. 1d, 1m
+    :param kwargs: passed to yf.download
+    :return: bars with the same columns as yf.download i.e. (field, ticker), tickers without any data are left out
+    """
+    tickers = list(dict.fromkeys(tickers))
+    start = (pd.Timestamp.now() - pd.Timedelta(days=PERIOD_DAYS[period])).normalize()
+
+    cached: dict[str, CachedPrices] = {}
+    not_cached: list[str] = []
+    # tickers grouped by the day from which they are missing, each group is downloaded in one call
+    missing_from: dict[str, list[str]] = {}
+    for ticker in tickers:
+        entry = load_cached(ticker, interval)
+        # a ticker whose cached bars all fall before the period is downloaded again instead of patching the gap
+        if entry is None or entry.covered_from > start or since(entry.frame, start).empty:
+            not_cached.append(ticker)
+            continue
+        cached[ticker] = entry
+        if time() - entry.fetched_at > PRICE_CACHE_MAX_AGE:
+            missing_from.setdefault(entry.frame.index[-1].strftime('%Y-%m-%d'), []).append(ticker)
+
+    logger.info(f"{interval} bars: {len(cached)} cached, {len(not_cached)} to download for {period}")
+
+    fetched_at = time()
+    if not_cached:
+        for ticker, frame in (fetch(not_cached, interval, period=period, **kwargs) or {}).items():
+            cached[ticker] = CachedPrices(frame, start, fetched_at)
+            save_cached(ticker, interval, cached[ticker])
+
+    # tickers whose history was adjusted since it was cached
+    readjusted: list[str] = []
+    for day, group in missing_from.items():
+        fetched = fetch(group, interval, start=day, **kwargs)
+        # a failed download is tried again on the next call
+        if fetched is None:
+            continue
+        for ticker in group:
+            entry, frame = cached[ticker], fetched.get(ticker)
+            if frame is None:
+                # no new bars e.g. on a holiday or for a suspended ticker, it is not downloaded again till it is old
+                entry.fetched_at = fetched_at
+                save_cached(ticker, interval, entry)
+                continue
+            if adjusted(entry.frame, frame):
+                readjusted.append(ticker)
+                continue
+            # the last cached bar may have been taken before it closed, so it is replaced by the downloaded one
+            merged = pd.concat([entry.frame[entry.frame.index < frame.index[0]], frame.reindex(columns=entry.frame.columns)])
+            merged = merged[~merged.index.duplicated(keep='last')]
+            if interval in INTRADAY_INTERVALS:
+                merged = since(merged, start)
+                entry.covered_from = start
+            entry.frame, entry.fetched_at = merged, fetched_at
+            save_cached(ticker, interval, entry)
+
+    if readjusted:
+        logger.info(f"{interval} bars adjusted since they were cached, downloading {readjusted} again for {period}")
+        for ticker, frame in (fetch(readjusted, interval, period=period, **kwargs) or {}).items():
+            cached[ticker] = CachedPrices(frame, start, fetched_at)
+            save_cached(ticker, interval, cached[ticker])
+
+    frames = {ticker: since(cached[ticker].frame, start) for ticker in tickers if ticker in cached}
+    if not frames:
+        return pd.DataFrame()
+    result = pd.concat(frames, axis=1).swaplevel(axis=1).sort_index(axis=1)
+    result.columns.names = ['Price', 'Ticker']
+    return result.sort_index()
@@ -0,0 +1,60 @@
+import sys
+from logging import Logger
+from time import perf_counter
+
+from utils.logger import get_logger
+
+logger: Logger = get_logger(__name__)
+
+# modules which only some modes need, the report tells which of them have been loaded
+HEAVY_MODULES = ['tensorflow', 'keras', 'yfinance', 'bs4']
+
+
+class StartupTimer:
+    """
+        Seconds and modules imported by each phase of the start, e.g. the imports of main or loading the daily prices.
+
+        A phase runs from the end of the previous one, the first one from when this module is imported, so main
+        imports it before anything else. For the cost of each imported module run python -X importtime main.py.
+    """
+
+    def __init__(self):
+        self.phases: list[tuple[str, float, int]] = []  # name, seconds and number of modules imported
+        self.__last = perf_counter()
+        self.__modules = len(sys.modules)
+
+    def mark(self, phase: str) -> float:
+        """
+        ends the phase
+        :param phase: name of the phase
+        :return: seconds taken by the phase
+        """
+        now, modules = perf_counter(), len(sys.modules)
+        seconds = now - self.__last
+        self.phases.append((phase, seconds, modules - self.__modules))
+        self.__last, self.__modules = now, modules
+        return seconds
+
+    def report(self, unexpected: list[str] | None = None) -> str:
+        """
+        logs the phases marked so far
+        :param unexpected: heavy modules the mode must not load, a warning is logged for each one loaded
+        :return: the report, one line per phase
+        """
+        lines = [f"{phase:<20}{seconds:>9.3f} s{modules:>6} modules" for phase, seconds, modules in self.phases]
+        lines.append(f"{'total':<20}{sum(seconds for _, seconds, _ in self.phases):>9.3f} s"
+                     f"{sum(modules for _, _, modules in self.phases):>6} modules")
+        loaded = [module for module in HEAVY_MODULES if module in sys.modules]
+        lines.append(f"heavy modules loaded: {', '.join(loaded) if loaded else 'none'}")
+
+        report = "\n".join(lines)
+        logger.info(f"startup time\n{report}")
+
+        loaded_unexpectedly = [module for module in unexpected or [] if module in sys.modules]
+        if loaded_unexpectedly:
+            logger.warning(f"{', '.join(loaded_unexpectedly)} loaded during the start although this mode does not "
+                           f"need them, run python -X importtime main.py to find which import loads them")
+        return report
+
+
+startup_timer = StartupTimer()
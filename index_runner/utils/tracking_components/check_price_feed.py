@@ -0,0 +1,97 @@
+"""
+    Checks the price feed offline against the fake ticker server: the prices of the ticking symbols are current, the
+    others are stale, and after a disconnect every symbol is stale till the ticker is connected again.
+
+    run from index_runner or penny_runner: python -m utils.tracking_components.check_price_feed
+"""
+import subprocess
+import sys
+from logging import Logger
+from time import monotonic, sleep
+
+from constants.settings import YFINANCE_EXTENSION
+from utils.logger import get_logger
+from utils.tracking_components.fake_ticker_server import fake_instrument_tokens
+from utils.tracking_components.price_feed import PriceFeed
+
+logger: Logger = get_logger(__name__)
+
+PORT = 8083  # port on which fake_ticker_server listens when run as a module
+TICKING = ["RELIANCE", "TCS", "INFY"]  # symbols served by the fake server
+SILENT = "SILENTCO"  # subscribed but never served, so it is always stale
+MAX_AGE = 3  # seconds after which a price is stale, the fake server ticks every second
+TIMEOUT = 30  # seconds waited for a connection, a disconnect or the first ticks
+
+
+def start_server() -> subprocess.Popen:
+    # the server runs in its own process as the ticker of the feed runs the twisted reactor of this process
+    return subprocess.Popen([sys.executable, "-m", "utils.tracking_components.fake_ticker_server", *TICKING])
+
+
+def wait_for(condition, description: str):
+    """
+    :param condition: function returning whether the state is reached
+    :param description: state waited for, used in the error
+    :return: None
+    """
+    deadline = monotonic() + TIMEOUT
+    while not condition():
+        if monotonic() > deadline:
+            raise AssertionError(f"timed out waiting for {description}")
+        sleep(0.2)
+
+
+def check_ticking(feed: PriceFeed, symbols: list[str]):
+    """
+    the ticking symbols have a current price in the format of fetch_current_prices and are not polled
+    """
+    wait_for(lambda: not feed.stale_symbols(TICKING, MAX_AGE), "the ticks of every served symbol")
+    prices = feed.current_prices(symbols, MAX_AGE)
+    assert prices is not None and prices.shape == (1, len(TICKING)), prices
+    expected = sorted(f"{symbol}.{YFINANCE_EXTENSION}" for symbol in TICKING)
+    assert sorted(prices.columns) == expected, list(prices.columns)
+    assert (prices.iloc[0] > 0).all(), prices
+    assert feed.stale_symbols(symbols, MAX_AGE) == [SILENT], feed.stale_symbols(symbols, MAX_AGE)
+
+
+def check_disconnected(feed: PriceFeed, symbols: list[str]):
+    """
+    without a connection there is no current price and every symbol is polled
+    """
+    wait_for(lambda: not feed.is_connected, "the ticker to notice the disconnect")
+    assert feed.current_prices(symbols, MAX_AGE) is None
+    assert feed.stale_symbols(symbols, MAX_AGE) == symbols, feed.stale_symbols(symbols, MAX_AGE)
+    assert all(feed.last_price(symbol) is None for symbol in symbols)
+
+
+def main():
+    symbols = TICKING + [SILENT]
+    feed = PriceFeed(root=f"ws://127.0.0.1:{PORT}", instrument_tokens=fake_instrument_tokens(symbols))
+    server = start_server()
+    try:
+        # nothing has ticked before the feed is started
+        assert feed.current_prices(symbols, MAX_AGE) is None
+        assert feed.stale_symbols(symbols, MAX_AGE) == symbols
+
+        feed.start(symbols)
+        check_ticking(feed, symbols)
+        logger.info("ticks received, the symbol which does not tick is stale")
+
+        server.terminate()
+        server.wait()
+        check_disconnected(feed, symbols)
+        logger.info("disconnected, every symbol is stale")
+
+        server = start_server()
+        wait_for(lambda: feed.is_connected, "the ticker to reconnect")
+        check_ticking(feed, symbols)
+        logger.info("reconnected, the symbols are subscribed again and tick")
+    finally:
+        feed.stop()
+        server.terminate()
+        server.wait()
+    logger.info("price feed check passed")
+
+
+if __name__ == "__main__":
+    main()
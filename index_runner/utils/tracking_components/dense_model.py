@@ -0,0 +1,136 @@
+from os import getcwd, path as os_path
+
+import numpy as np
+import pandas as pd
+
+from constants.enums.shift import Shift
+
+
+def relu(values: np.ndarray) -> np.ndarray:
+    return np.maximum(values, 0.0, out=values)
+
+
+def sigmoid(values: np.ndarray) -> np.ndarray:
+    # 1 / (1 + exp(-x)) without overflowing for large negative x
+    return np.exp(-np.logaddexp(0.0, -values))
+
+
+def linear(values: np.ndarray) -> np.ndarray:
+    return values
+
+
+ACTIVATIONS = {
+    "relu": relu,
+    "sigmoid": sigmoid,
+    "linear": linear
+}
+
+
+def model_path(shift: Shift) -> str:
+    """
+    :param shift: shift the model predicts for
+    :return: path of the exported weights and parameters of the model of the shift
+    """
+    return getcwd() + f"/temp/DNN_model_{shift.value.lower()}.npz"
+
+
+class DenseModel:
+    """
+        Forward pass of the Dense network trained with keras, in numpy so that keras is not needed to predict.
+
+        The mean and the standard deviation of the features are folded into the first layer, so a single call
+        normalises and scores all the stocks: (x - mu) / sigma @ w + b == x @ (w / sigma) + (b - mu / sigma @ w).
+        The arrays are written to an npz by export_model and loaded here without pickle.
+    """
+
+    def __init__(self, features: list[str], mu: np.ndarray, sigma: np.ndarray, weights: list[np.ndarray],
+                 biases: list[np.ndarray], activations: list[str]):
+        """
+        :param features: names of the inputs in the order of the first layer e.g. 6mo_0
+        :param mu: mean of each feature in the training data
+        :param sigma: standard deviation of each feature in the training data
+        :param weights: kernel of each Dense layer, inputs x units
+        :param biases: bias of each Dense layer
+        :param activations: name of the activation of each Dense layer, one of ACTIVATIONS
+        """
+        if not (len(weights) == len(biases) == len(activations)) or not weights:
+            raise ValueError("every layer needs a kernel, a bias and an activation")
+        for activation in activations:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"activation {activation} is not supported")
+
+        self.features = list(features)
+        self.mu = np.asarray(mu, dtype=np.float64)
+        self.sigma = np.asarray(sigma, dtype=np.float64)
+        self.weights = [np.asarray(weight, dtype=np.float64) for weight in weights]
+        self.biases = [np.asarray(bias, dtype=np.float64) for bias in biases]
+        self.activations = list(activations)
+
+        # the first layer takes the features as they are
+        self.__weights = list(self.weights)
+        self.__biases = list(self.biases)
+        self.__weights[0] = self.weights[0] / self.sigma[:, None]
+        self.__biases[0] = self.biases[0] - (self.mu / self.sigma) @ self.weights[0]
+        self.__activations = [ACTIVATIONS[activation] for activation in self.activations]
+
+    def __repr__(self) -> str:
+        layers = [f"{weight.shape[1]} {activation}" for weight, activation in zip(self.weights, self.activations)]
+        return f"DenseModel({len(self.features)} features -> {', '.join(layers)})"
+
+    @classmethod
+    def load(cls, path: str) -> "DenseModel":
+        """
+        :param path: npz written by save
+        :return: the model
+        """
+        with np.load(path) as arrays:
+            layers = int(arrays["layers"])
+            return cls(
+                features=arrays["features"].tolist(),
+                mu=arrays["mu"],
+                sigma=arrays["sigma"],
+                weights=[arrays[f"weight_{layer}"] for layer in range(layers)],
+                biases=[arrays[f"bias_{layer}"] for layer in range(layers)],
+                activations=arrays["activations"].tolist()
+            )
+
+    def save(self, path: str) -> None:
+        """
+        :param path: npz to write, the arrays are stored as they were given and without pickle
+        :return: None
+        """
+        np.savez_compressed(
+            path,
+            features=np.array(self.features, dtype=str),
+            mu=self.mu,
+            sigma=self.sigma,
+            layers=np.array(len(self.weights)),
+            activations=np.array(self.activations, dtype=str),
+            **{f"weight_{layer}": weight for layer, weight in enumerate(self.weights)},
+            **{f"bias_{layer}": bias for layer, bias in enumerate(self.biases)}
+        )
+
+    def predict(self, features) -> np.ndarray:
+        """
+        :param features: features which are not normalised, one row per stock, a DataFrame is taken by column name
+        :return: output of the last layer for each row, i.e. the probability of going up
+        """
+        if isinstance(features, pd.DataFrame):
+            features = features[self.features]
+        values = np.asarray(features, dtype=np.float64)
+
+        for weight, bias, activation in zip(self.__weights, self.__biases, self.__activations):
+            values = activation(values @ weight + bias)
+        return values[:, 0] if values.shape[1] == 1 else values
+
+
+def load_dense_model(shift: Shift) -> DenseModel:
+    """
+    :param shift: shift the model predicts for
+    :return: the exported model of the shift
+    """
+    # keras is never loaded here, a model trained without being exported has to be exported before the runner starts
+    if not os_path.exists(model_path(shift)):
+        raise FileNotFoundError(f"{model_path(shift)} is missing, export the trained model from index_runner with "
+                                f"python -m utils.tracking_components.training_components.export_model")
+    return DenseModel.load(model_path(shift))
@@ -0,0 +1,80 @@
+import asyncio
+from logging import Logger
+from threading import Lock
+from time import monotonic
+
+from constants.enums.request_priority import RequestPriority
+from constants.settings import CURRENT_STOCK_EXCHANGE, DEPTH_SNAPSHOT_TTL, KITE_QUOTE_BLOCK_SIZE
+from utils.logger import get_logger
+from utils.kite_scheduler import kite_scheduler
+
+logger: Logger = get_logger(__name__)
+
+
+class DepthSnapshot:
+    """
+        Market depth of all the stocks used in a tick.
+
+        Once per tick the depth of every stock which can be quoted is fetched with batched quote calls.
+        Every consumer of StockInfo.get_quote in that tick is then served from here till the depth expires.
+    """
+
+    def __init__(self, ttl: float = DEPTH_SNAPSHOT_TTL):
+        """
+        :param ttl: seconds for which a fetched depth is served
+        """
+        self.ttl = ttl
+        self.__depths: dict[str, tuple[float, dict]] = {}
+        self.__lock = Lock()
+
+    async def refresh(self, stock_list: list[str], priority: RequestPriority = RequestPriority.ENTRY_QUOTE,
+                      exchange: str = CURRENT_STOCK_EXCHANGE):
+        """
+        fetches the depth of all the stocks with one quote call per block of stocks
+
+        :param stock_list: list of symbols without NS or NSE
+        :param priority: priority of the quote calls
+        :param exchange: exchange of the symbols
+        :return: None
+        """
+        instruments = list(dict.fromkeys(f"{exchange}:{stock}" for stock in stock_list))
+
+        async def get_quotes(sub_list_of_instruments: list):
+            return await asyncio.wrap_future(kite_scheduler.submit("quote", sub_list_of_instruments, priority=priority))
+
+        blocks = [instruments[start:start + KITE_QUOTE_BLOCK_SIZE]
+                  for start in range(0, len(instruments), KITE_QUOTE_BLOCK_SIZE)]
+
+        data = await asyncio.gather(*[get_quotes(block) for block in blocks], return_exceptions=True)
+
+        for block in data:
+            if isinstance(block, Exception):
+                # the stocks of this block are fetched individually by get_quote
+                logger.error(f"error while fetching the depth snapshot: {block}")
+                continue
+            self.update(block)
+
+    def update(self, quotes: dict):
+        """
+        :param quotes: response of quote e.g. {'NSE:RELIANCE': {'depth': {...}, ...}}
+        :return: None
+        """
+        fetched_at = monotonic()
+        with self.__lock:
+            for instrument, quote in quotes.items():
+                self.__depths[instrument] = (fetched_at, quote["depth"])
+
+    def get(self, stock_name: str, exchange: str = CURRENT_STOCK_EXCHANGE) -> dict | None:
+        """
+        :param stock_name: symbol without NS or NSE
+        :param exchange: exchange of the symbol
+        :return: depth with the buy and sell orders or None if it is not fetched or has expired
+        """
+        with self.__lock:
+            fetched = self.__depths.get(f"{exchange}:{stock_name}")
+        if fetched is None or monotonic() - fetched[0] > self.ttl:
+            return None
+        return fetched[1]
+
+
+depth_snapshot = DepthSnapshot()
@@ -0,0 +1,49 @@
+from logging import Logger
+
+import pandas as pd
+
+from constants.settings import YFINANCE_EXTENSION
+from utils.indicators.candlestick.pattern_scanner import PatternScanner
+from utils.indicators.candlestick.patterns.bearish_engulfing import BearishEngulfing
+from utils.indicators.candlestick.patterns.bearish_harami import BearishHarami
+from utils.indicators.candlestick.patterns.bullish_engulfing import BullishEngulfing
+from utils.indicators.candlestick.patterns.bullish_harami import BullishHarami
+from utils.indicators.candlestick.patterns.evening_star import EveningStar
+from utils.indicators.candlestick.patterns.hammer import Hammer
+from utils.indicators.candlestick.patterns.inverted_hammer import InvertedHammer
+from utils.indicators.candlestick.patterns.morning_star import MorningStar
+from utils.logger import get_logger
+
+logger: Logger = get_logger(__name__)
+
+# the candlestick patterns checked before buying are scanned together, a buy needs a bullish one and no bearish one
+pattern_scanner = PatternScanner([BullishEngulfing, BullishHarami, MorningStar, Hammer, InvertedHammer,
+                                  BearishEngulfing, BearishHarami, EveningStar])
+BULLISH_PATTERNS = pattern_scanner.mask([BullishEngulfing, BullishHarami, MorningStar, Hammer, InvertedHammer])
+BEARISH_PATTERNS = pattern_scanner.mask([BearishEngulfing, BearishHarami, EveningStar])
+
+DEFAULT_OHLC = ['Open', 'High', 'Low', 'Close']
+
+
+def screen_universe(day_based_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Scans the daily candles of every stock at once before the market opens. A stock whose last daily candle ends
+    a bearish pattern is not eligible, so it is never quoted for entry during the day. This is a filter of its own
+    and not a shortcut of whether_buy, which checks the patterns ending at the intraday bar, so it is only applied
+    when DAILY_PATTERN_SCREEN is set.
+
+    :param day_based_df: daily candles with (field, ticker) columns e.g. ('Close', 'RELIANCE.NS')
+    :return: one row per symbol without NS with the bits of the patterns on the last daily candle and
+             whether it is bullish, bearish and eligible
+    """
+    patterns = pattern_scanner.scan_universe(day_based_df, DEFAULT_OHLC, last_n=1).iloc[-1]
+    screen = pd.DataFrame({
+        "patterns": patterns.to_numpy(),
+        "bullish": (patterns.to_numpy() & BULLISH_PATTERNS) != 0,
+        "bearish": (patterns.to_numpy() & BEARISH_PATTERNS) != 0
+    }, index=[ticker.removesuffix(f".{YFINANCE_EXTENSION}") for ticker in patterns.index])
+    screen["eligible"] = ~screen["bearish"]
+
+    logger.info(f"daily pattern screen: {int(screen['bullish'].sum())} bullish, "
+                f"{int((~screen['eligible']).sum())} of {len(screen)} ruled out")
+    return screen
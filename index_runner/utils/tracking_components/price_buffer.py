@@ -0,0 +1,162 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+class PriceRingBuffer:
+    """
+        Fixed capacity matrix of the intraday prices, one column per symbol.
+
+        Every row is written twice, at its position and at position + capacity, so the latest rows are always
+        contiguous and a window is a view of the buffer instead of a copy. Columns are kept packed at the start of
+        the matrix and only move when symbols are removed.
+
+        The views are only valid till the next append as the oldest rows get overwritten.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32):
+        """
+        :param capacity: maximum number of rows kept, older rows are discarded
+        :param dtype: dtype of the prices
+        """
+        self.capacity = capacity
+        self.__data = np.full((2 * capacity, 0), np.nan, dtype=dtype)
+        self.__labels: list[str] = []
+        self.__slots: dict[str, int] = {}
+        self.__head = 0  # position where the next row is written
+        self.__size = 0  # number of rows held
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, capacity: int, dtype=np.float32) -> "PriceRingBuffer":
+        """
+        loads the frame as it is, symbols without any price are kept till the first append
+        :param frame: prices with the symbols as columns e.g. RELIANCE.NS
+        :param capacity: maximum number of rows kept
+        :param dtype: dtype of the prices
+        :return: buffer holding the last capacity rows of the frame
+        """
+        buffer = cls(capacity, dtype)
+        buffer.__add_columns(list(frame.columns))
+        for row in frame.to_numpy(dtype=dtype)[-capacity:]:
+            buffer.__write(row)
+        return buffer
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.__labels)
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def __add_columns(self, labels: list[str]):
+        width = len(self.__labels) + len(labels)
+        if width > self.__data.shape[1]:
+            # columns grow geometrically so that adding symbols is amortised
+            data = np.full((2 * self.capacity, max(width, 2 * self.__data.shape[1])), np.nan, dtype=self.__data.dtype)
+            data[:, :len(self.__labels)] = self.__data[:, :len(self.__labels)]
+            self.__data = data
+        # the slots may still hold the prices of removed symbols
+        self.__data[:, len(self.__labels):width] = np.nan
+        for label in labels:
+            self.__slots[label] = len(self.__labels)
+            self.__labels.append(label)
+
+    def __write(self, row: np.ndarray):
+        width = len(self.__labels)
+        self.__data[self.__head, :width] = row
+        self.__data[self.__head + self.capacity, :width] = row
+        self.__head = (self.__head + 1) % self.capacity
+        self.__size = min(self.__size + 1, self.capacity)
+
+    def last(self) -> np.ndarray:
+        """
+        :return: latest price of each symbol in the order of columns
+        """
+        if self.__size == 0:
+            return np.full(len(self.__labels), np.nan, dtype=self.__data.dtype)
+        return self.__data[self.__head + self.capacity - 1, :len(self.__labels)]
+
+    def append(self, prices: pd.DataFrame):
+        """
+        Appends the rows with the same filling as concat followed by bfill, ffill and dropna(axis=1).
+        Missing prices are carried forward, symbols seen for the first time get their first price for the whole
+        window and symbols which still have no price are removed.
+
+        :param prices: rows of prices with the symbols as columns
+        :return: None
+        """
+        new_labels = [label for label in prices.columns if label not in self.__slots]
+        self.__add_columns(new_labels)
+        width = len(self.__labels)
+        positions = np.array([self.__slots[label] for label in prices.columns], dtype=int)
+
+        for values in prices.to_numpy(dtype=self.__data.dtype):
+            previous = self.last()
+            row = previous.copy()
+            row[positions] = np.where(np.isnan(values), row[positions], values)
+            if self.__size:
+                # backfilling the whole history of the symbols which get their first price now
+                first_prices = np.flatnonzero(np.isnan(previous) & ~np.isnan(row))
+                self.__data[:, first_prices] = row[first_prices]
+            self.__write(row[:width])
+
+        self.keep([label for label, price in zip(self.__labels, self.last()) if not np.isnan(price)])
+
+    def keep(self, labels: list[str]):
+        """
+        removes all the symbols other than the given ones
+        :param labels: symbols to keep, the order of the columns is changed to this order
+        :return: None
+        """
+        labels = [label for label in labels if label in self.__slots]
+        if labels == self.__labels:
+            return
+        positions = [self.__slots[label] for label in labels]
+        self.__data[:, :len(labels)] = self.__data[:, positions]
+        self.__labels = labels
+        self.__slots = {label: slot for slot, label in enumerate(labels)}
+
+    def window(self, rows: int | None = None) -> np.ndarray:
+        """
+        :param rows: number of latest rows, all the rows held when not given
+        :return: view of the latest rows with the symbols as columns
+        """
+        rows = self.__size if rows is None else min(rows, self.__size)
+        end = self.__head + self.capacity
+        return self.__data[end - rows:end, :len(self.__labels)]
+
+    def column(self, label: str, rows: int | None = None) -> np.ndarray:
+        """
+        :param label: symbol e.g. RELIANCE.NS
+        :param rows: number of latest rows, all the rows held when not given
+        :return: view of the prices of the symbol
+        """
+        return self.window(rows)[:, self.__slots[label]]
+
+    def frame(self, rows: int | None = None) -> pd.DataFrame:
+        """
+        :param rows: number of latest rows, all the rows held when not given
+        :return: dataframe over the view of the latest rows with the same columns as prediction_df
+        """
+        return pd.DataFrame(self.window(rows), columns=self.columns, copy=False)
+
+
+def value_at_risk(prices: np.ndarray, columns: list[str], step: int = 60, quantile: float = 0.005) -> pd.Series:
+    """
+    same as prices.iloc[::step].pct_change().quantile(quantile, interpolation='lower') without building the frame
+
+    :param prices: matrix of the prices with the symbols as columns
+    :param columns: symbols of the columns
+    :param step: rows between two sampled prices
+    :param quantile: quantile of the returns
+    :return: value at risk of each symbol
+    """
+    sampled = prices[::step]
+    if sampled.shape[0] < 2:
+        return pd.Series(np.nan, index=columns, dtype=prices.dtype)
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        # a symbol without any return gets nan as in pandas
+        warnings.simplefilter('ignore', RuntimeWarning)
+        returns = sampled[1:] / sampled[:-1] - 1
+        return pd.Series(np.nanquantile(returns, quantile, axis=0, method='lower'), index=columns)
@@ -0,0 +1,174 @@
+from logging import Logger
+from threading import Lock
+from time import monotonic
+
+import pandas as pd
+from kiteconnect import KiteTicker
+
+from constants.global_contexts import kite_context
+from constants.settings import CURRENT_STOCK_EXCHANGE, YFINANCE_EXTENSION, TICKER_ROOT_URI, SLEEP_INTERVAL
+from utils.kite_scheduler import kite_scheduler
+from utils.logger import get_logger
+from utils.tracking_components.symbol_series import SERIES
+
+logger: Logger = get_logger(__name__)
+
+
+class PriceFeed:
+    """
+        Websocket backed price feed.
+
+        It subscribes the symbols to the kite ticker in LTP mode and keeps the last traded price of each symbol
+        in memory. The trading loop reads the table instead of polling the ltp api every interval, a price is only
+        given while the ticker is connected and if it was received within the interval, the others are polled.
+
+        The ticker runs its own twisted reactor in a separate thread, so the table is guarded by a lock.
+    """
+
+    def __init__(self, exchange: str = CURRENT_STOCK_EXCHANGE, root: str | None = TICKER_ROOT_URI,
+                 instrument_tokens: dict[str, int] | None = None):
+        """
+        :param exchange: exchange of the symbols which are subscribed
+        :param root: websocket uri, if None the kite uri is used
+        :param instrument_tokens: mapping of symbol to instrument token, if None it is loaded from the kite api
+        """
+        self.exchange = exchange
+        self.root = root
+        self.__tokens: dict[str, int] | None = instrument_tokens
+        self.__symbols: dict[int, str] = {}
+        self.__last_prices: dict[str, float] = {}
+        self.__tick_times: dict[str, float] = {}  # monotonic time of the last tick of each symbol
+        self.__subscribed: set[int] = set()
+        self.__lock = Lock()
+        self.__ticker: KiteTicker | None = None
+
+    @property
+    def instrument_tokens(self) -> dict[str, int]:
+        """
+            mapping of trading symbol to instrument token, loaded once from the instrument dump of the exchange
+        """
+        if self.__tokens is None:
+            self.__tokens = {
+                instrument['tradingsymbol']: instrument['instrument_token']
+                for instrument in kite_scheduler.instruments(self.exchange)
+            }
+        return self.__tokens
+
+    @property
+    def is_connected(self) -> bool:
+        return self.__ticker is not None and self.__ticker.is_connected()
+
+    def start(self, symbols: list[str]):
+        """
+        connects to the websocket in a background thread and subscribes the given symbols
+
+        :param symbols: list of symbols without NS or NSE, e.g. ['20MICRONS-BE', 'RELIANCE']
+        :return: None
+        """
+        if self.__ticker is None:
+            self.__ticker = KiteTicker(kite_context.api_key, kite_context.access_token, root=self.root)
+            self.__ticker.on_ticks = self.__on_ticks
+            self.__ticker.on_connect = self.__on_connect
+            self.__ticker.on_close = self.__on_close
+            self.__ticker.on_error = self.__on_error
+            self.__ticker.on_reconnect = self.__on_reconnect
+            self.subscribe(symbols)
+            self.__ticker.connect(threaded=True)
+        else:
+            self.subscribe(symbols)
+
+    def stop(self):
+        if self.__ticker is not None:
+            self.__ticker.close()
+            self.__ticker = None
+
+    def subscribe(self, symbols: list[str]):
+        """
+        adds the symbols to the subscription, symbols without any instrument token are ignored
+
+        :param symbols: list of symbols without NS or NSE
+        :return: None
+        """
+        tokens = []
+        for symbol in symbols:
+            # the symbol is subscribed in the series in which it trades but the prices are kept against the symbol
+            token = self.instrument_tokens.get(SERIES.get(symbol, symbol))
+            if token is not None and token not in self.__subscribed:
+                self.__symbols[token] = symbol
+                tokens.append(token)
+        self.__subscribed.update(tokens)
+
+        # if not connected yet the subscription is sent while connecting
+        if tokens and self.is_connected:
+            self.__ticker.subscribe(tokens)
+            self.__ticker.set_mode(self.__ticker.MODE_LTP, tokens)
+
+    def last_price(self, symbol: str) -> float | None:
+        with self.__lock:
+            return self.__last_prices.get(symbol)
+
+    def __fresh(self, stock_list: list[str], max_age: float) -> list[str]:
+        """
+        :return: symbols whose last tick is at most max_age seconds old, none while the ticker is disconnected
+        """
+        if not self.is_connected:
+            return []
+        now = monotonic()
+        with self.__lock:
+            return [stock for stock in stock_list if now - self.__tick_times.get(stock, float("-inf")) <= max_age]
+
+    def stale_symbols(self, stock_list: list[str], max_age: float = SLEEP_INTERVAL) -> list[str]:
+        """
+        :param stock_list: a list of symbols without NS or NSE
+        :param max_age: seconds after which a price is no longer current
+        :return: symbols without a current price, which have to be polled
+        """
+        fresh = set(self.__fresh(stock_list, max_age))
+        return [stock for stock in stock_list if stock not in fresh]
+
+    def current_prices(self, stock_list: list[str], max_age: float = SLEEP_INTERVAL) -> pd.DataFrame | None:
+        """
+        It returns the prices in the same format as fetch_current_prices
+
+        :param stock_list: a list of symbols without NS or NSE
+        :param max_age: seconds after which a price is no longer current
+        :return: a dataframe with a current prices for the stocks which ticked within max_age with column containing
+            .NS or None if there is none, e.g. while the ticker is disconnected
+        """
+        fresh = self.__fresh(stock_list, max_age)
+        with self.__lock:
+            raw_data = {
+                f"{stock}.{YFINANCE_EXTENSION}": [self.__last_prices[stock]]
+                for stock in fresh if stock in self.__last_prices
+            }
+        if len(raw_data) == 0:
+            return None
+        return pd.DataFrame(raw_data)
+
+    def __on_ticks(self, ws, ticks):
+        with self.__lock:
+            for tick in ticks:
+                symbol = self.__symbols.get(tick['instrument_token'])
+                if symbol is not None:
+                    self.__last_prices[symbol] = tick['last_price']
+                    self.__tick_times[symbol] = monotonic()
+
+    def __on_connect(self, ws, response):
+        tokens = list(self.__subscribed)
+        logger.info(f"ticker connected, subscribing {len(tokens)} instruments")
+        if tokens:
+            ws.subscribe(tokens)
+            ws.set_mode(ws.MODE_LTP, tokens)
+
+    def __on_close(self, ws, code, reason):
+        logger.info(f"ticker closed: {code} {reason}")
+        # the prices are polled till the ticker is connected again and sends new ticks
+        with self.__lock:
+            self.__last_prices.clear()
+            self.__tick_times.clear()
+
+    def __on_error(self, ws, code, reason):
+        logger.error(f"ticker error: {code} {reason}")
+
+    def __on_reconnect(self, ws, attempts_count):
+        logger.info(f"ticker reconnecting: attempt {attempts_count}")
@@ -3,58 +3,42 @@ import numpy as np
 import pandas as pd
 
 from constants.enums.shift import Shift
+from utils.indicators.rolling_slope import SlopeState, SLOPE_WINDOWS, SLOPE_SHIFTS
+from utils.tracking_components.dense_model import DenseModel
 from utils.logger import get_logger
 
 logger: Logger = get_logger(__name__)
 
 
-def predict_running_df(day_based_data, model, params):
+def predict_running_df(day_based_data, model: DenseModel):
 
-    def get_slope(col):
-        index = list(col.index)
-        coefficient = np.polyfit(index, col.values, 1)
-        ini = coefficient[0]*index[0]+coefficient[1]
-        return coefficient[0]/ini
-
-    mu, sigma = params
-    mu = mu.iloc[:-1]
-    sigma = sigma.iloc[:-1]
+    # sums of the daily prices of every window, so a tick only adds the newest price of each stock
+    daily_state = SlopeState(day_based_data.to_numpy(dtype=np.float64))
 
     def predict_stocks(min_based_data, shift: Shift):
 
-        stocks_df = None
+        latest_df = None
 
         if shift == Shift.MORNING:
-            stocks_df = pd.concat([day_based_data, min_based_data.iloc[0:1]], ignore_index=True)
+            latest_df = min_based_data.iloc[0:1]
         elif shift == Shift.EVENING:
-            stocks_df = pd.concat([day_based_data, min_based_data.iloc[-2:-1]], ignore_index=True)
+            latest_df = min_based_data.iloc[-2:-1]
 
-        if stocks_df is None:
+        if latest_df is None:
             return []
 
-        col_with_period = {
-                '6mo': 132,
-                '3mo': 66,
-                '1mo': 22,
-                '5d': 5,
-                '2d': 2
-            }
-
-        shifts = [sh for sh in range(3)]
-        gen_cols = []
-
-        concat_lst = []
-        for shift in shifts:
-            for key, val in col_with_period.items():
-                gen_cols.append(f"{key}_{shift}")
-                concat_lst.append(stocks_df.reset_index(drop=True).iloc[-val:].apply(get_slope))
+        # the newest price is taken per stock as concatenating it below the daily prices did
+        latest = None if latest_df.empty else latest_df.iloc[0].reindex(day_based_data.columns).to_numpy(dtype=np.float64)
+        slopes = daily_state.slopes(latest)
 
-        running_df = pd.concat(concat_lst, axis=1)
-        running_df.columns = gen_cols
+        # every shift takes the same latest rows
+        running_df = pd.DataFrame({
+            f"{key}_{shift}": slopes[key] for shift in range(SLOPE_SHIFTS) for key in SLOPE_WINDOWS
+        }, index=day_based_data.columns)
 
         running_df.dropna(inplace=True)
-        running_df_s = (running_df-mu)/sigma
-        running_df['prob'] = model.predict(running_df_s)
+        # the model normalises the features with the mu and sigma of its training data
+        running_df['prob'] = model.predict(running_df)
         running_df['position'] = np.where(running_df['prob'] > 0.79, 1, 0)
 
         selected = []
@@ -0,0 +1,175 @@
+import json
+import struct
+from logging import Logger
+from os import makedirs, path as os_path, truncate
+from queue import Queue, Empty
+from threading import Thread
+from time import monotonic
+
+import numpy as np
+import pandas as pd
+
+from constants.settings import SNAPSHOT_FLUSH_TICKS, SNAPSHOT_FLUSH_SECONDS
+from utils.logger import get_logger
+from utils.tracking_components.price_buffer import PriceRingBuffer
+
+logger: Logger = get_logger(__name__)
+
+# every record is a kind and the length of the payload followed by the payload
+RECORD_HEADER = struct.Struct("<cI")
+COLUMNS_RECORD = b"C"  # json list of the symbols, written whenever the symbols change
+ROW_RECORD = b"R"  # float32 prices of the symbols of the latest columns record
+
+
+class SnapshotLog:
+    """
+        Append only binary log of the intraday prices of a day.
+
+        The tick only hands over the latest row, a background thread encodes the records and appends them to the file
+        every flush_ticks rows or flush_seconds. Replaying the log through PriceRingBuffer gives back the exact state
+        of the buffer after the last flushed tick.
+    """
+
+    def __init__(self, file_path: str, flush_ticks: int = SNAPSHOT_FLUSH_TICKS,
+                 flush_seconds: float = SNAPSHOT_FLUSH_SECONDS, export_path: str | None = None):
+        """
+        :param file_path: path of the log
+        :param flush_ticks: rows after which the records are written
+        :param flush_seconds: seconds after which the records are written even if there are fewer rows
+        :param export_path: if given the window is also exported to this csv on every flush
+        """
+        self.file_path = file_path
+        self.flush_ticks = flush_ticks
+        self.flush_seconds = flush_seconds
+        self.export_path = export_path
+        self.__columns: list[str] | None = None
+        self.__queue: Queue = Queue()
+        self.__thread: Thread | None = None
+
+    def start(self, capacity: int):
+        """
+        starts the writer thread
+        :param capacity: rows of the window exported to the csv
+        :return: None
+        """
+        makedirs(os_path.dirname(self.file_path), exist_ok=True)
+        self.__thread = Thread(target=self.__write, args=(capacity,), daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """
+        writes the pending records and stops the writer thread
+        :return: None
+        """
+        if self.__thread is not None:
+            self.__queue.put(None)
+            self.__thread.join()
+            self.__thread = None
+
+    def record(self, buffer: PriceRingBuffer):
+        """
+        queues the latest row of the buffer, it is called once per tick after the buffer is updated
+        :param buffer: buffer holding the intraday prices
+        :return: None
+        """
+        columns = buffer.columns
+        if columns != self.__columns:
+            self.__columns = columns
+            self.__queue.put((COLUMNS_RECORD, json.dumps(columns).encode()))
+        self.__queue.put((ROW_RECORD, buffer.last().astype(np.float32).tobytes()))
+
+    def __write(self, capacity: int):
+        # copy of the buffer rebuilt from the records, only used to export the csv
+        mirror: PriceRingBuffer | None = None
+        columns: list[str] = []
+        pending: list[bytes] = []
+        rows, last_flush, stopped = 0, monotonic(), False
+
+        while not stopped:
+            try:
+                item = self.__queue.get(timeout=max(0.0, last_flush + self.flush_seconds - monotonic()))
+            except Empty:
+                item = False
+
+            if item is None:
+                stopped = True
+            elif item:
+                kind, payload = item
+                pending.append(RECORD_HEADER.pack(kind, len(payload)) + payload)
+                if kind == COLUMNS_RECORD:
+                    columns = json.loads(payload)
+                else:
+                    rows += 1
+                    if self.export_path is not None:
+                        mirror = self.__replay(mirror, columns, np.frombuffer(payload, dtype=np.float32), capacity)
+
+            if pending and (stopped or rows >= self.flush_ticks or monotonic() - last_flush >= self.flush_seconds):
+                try:
+                    with open(self.file_path, "ab") as file:
+                        file.write(b"".join(pending))
+                    if mirror is not None:
+                        mirror.frame().to_csv(self.export_path)
+                except:
+                    logger.exception(f"error while writing the snapshot to {self.file_path}")
+                pending, rows, last_flush = [], 0, monotonic()
+            elif not pending:
+                last_flush = monotonic()
+
+    @staticmethod
+    def __replay(buffer: PriceRingBuffer | None, columns: list[str], row: np.ndarray,
+                 capacity: int) -> PriceRingBuffer:
+        frame = pd.DataFrame([row], columns=columns)
+        if buffer is None:
+            # the first row is the state loaded at the start of the day which can have symbols without a price
+            return PriceRingBuffer.from_frame(frame, capacity)
+        buffer.append(frame)
+        buffer.keep(columns)
+        return buffer
+
+    @staticmethod
+    def __complete(kind: bytes, length: int, columns: list[str]) -> bool:
+        """
+        :return: whether the header can be the header of a record, a crash in the middle of a record leaves
+                 a header whose kind or length makes no sense
+        """
+        if kind == COLUMNS_RECORD:
+            return True
+        return kind == ROW_RECORD and length == len(columns) * np.dtype(np.float32).itemsize
+
+    def load(self, capacity: int) -> PriceRingBuffer | None:
+        """
+        rebuilds the buffer from the log, a record cut short by a crash and everything after it is cut off the file
+        so that the next records are appended after the last complete one
+        :param capacity: maximum number of rows kept
+        :return: buffer as it was after the last flushed tick or None if nothing has been logged
+        """
+        try:
+            with open(self.file_path, "rb") as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+
+        # offset is the end of the last complete record
+        buffer, columns, offset = None, [], 0
+        while offset + RECORD_HEADER.size <= len(data):
+            kind, length = RECORD_HEADER.unpack_from(data, offset)
+            end = offset + RECORD_HEADER.size + length
+            if end > len(data) or not self.__complete(kind, length, columns):
+                break
+            payload = data[offset + RECORD_HEADER.size:end]
+            if kind == COLUMNS_RECORD:
+                try:
+                    columns = json.loads(payload)
+                except ValueError:
+                    break
+            else:
+                buffer = self.__replay(buffer, columns, np.frombuffer(payload, dtype=np.float32), capacity)
+            offset = end
+
+        if offset < len(data):
+            logger.warning(f"cutting {len(data) - offset} bytes of a record written partly off {self.file_path}")
+            truncate(self.file_path, offset)
+
+        # the next record starts with the columns
+        self.__columns = None
+        return buffer
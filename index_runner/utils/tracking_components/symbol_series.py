@@ -0,0 +1,96 @@
+import json
+import re
+from datetime import datetime
+from logging import Logger
+from os import getcwd
+
+from constants.settings import SYMBOL_SERIES_PATH, CURRENT_STOCK_EXCHANGE, TODAY
+from utils.logger import get_logger
+
+logger: Logger = get_logger(__name__)
+
+# maps the symbol without -BE to the trading symbol in which it actually trades e.g. {'20MICRONS': '20MICRONS-BE'}
+# symbols which did not trade in any of the series while resolving are mapped to None
+SERIES: dict[str, str | None] = {}
+__resolved_on: str | None = None
+
+
+def load_series() -> dict[str, str | None]:
+    """
+    loads the series resolved today from the disk, if it was resolved on an earlier day it is discarded
+    so that it is refreshed daily
+    :return: mapping of symbol to trading symbol
+    """
+    global SERIES, __resolved_on
+    if __resolved_on != str(TODAY.date()):
+        try:
+            with open(getcwd() + SYMBOL_SERIES_PATH) as file:
+                data = json.load(file)
+            if data['date'] == str(TODAY.date()):
+                SERIES.update(data['series'])
+                __resolved_on = data['date']
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            logger.info("no series resolved today")
+    return SERIES
+
+
+def save_series():
+    global __resolved_on
+    __resolved_on = str(TODAY.date())
+    with open(getcwd() + SYMBOL_SERIES_PATH, "w") as file:
+        json.dump({'date': __resolved_on, 'series': SERIES, 'updated_at': str(datetime.now())}, file)
+
+
+def base_symbol(trading_symbol: str) -> str:
+    return trading_symbol[:-3] if trading_symbol.endswith('-BE') else trading_symbol
+
+
+def series_instruments(stock_list) -> list[str]:
+    """
+    Only the series in which the symbol trades is queried and symbols which do not trade are skipped.
+    If the symbol is not resolved yet then both the series are queried.
+    :param stock_list: list of symbols without NS or NSE
+    :return: list of instruments e.g. ['NSE:20MICRONS-BE', 'NSE:RELIANCE']
+    """
+    instruments = []
+    for stock in stock_list:
+        stock = base_symbol(stock)
+        if stock in SERIES:
+            if SERIES[stock] is not None:
+                instruments.append(f"{CURRENT_STOCK_EXCHANGE}:{SERIES[stock]}")
+        else:
+            instruments.append(f"{CURRENT_STOCK_EXCHANGE}:{stock}")
+            instruments.append(f"{CURRENT_STOCK_EXCHANGE}:{stock}-BE")
+    return instruments
+
+
+def update_series(ltp_data: dict) -> bool:
+    """
+    resolves the series from the response of ltp, if a symbol trades in both the series the regular one is kept
+    :param ltp_data: response of ltp e.g. {'NSE:20MICRONS-BE': {...}, 'NSE:RELIANCE': {...}}
+    :return: True if any new symbol has been resolved
+    """
+    updated = False
+    for key in ltp_data.keys():
+        trading_symbol = re.split(":", key)[-1]
+        stock = base_symbol(trading_symbol)
+        current = SERIES.get(stock)
+        if current is None or (current != stock and trading_symbol == stock):
+            SERIES[stock] = trading_symbol
+            updated = True
+    return updated
+
+
+def mark_untraded(stock_list) -> bool:
+    """
+    the symbols which are still not resolved after querying both the series are marked as not traded
+    :param stock_list: list of symbols which were queried
+    :return: True if any symbol has been marked
+    """
+    updated = False
+    for stock in stock_list:
+        stock = base_symbol(stock)
+        if stock not in SERIES:
+            SERIES[stock] = None
+            updated = True
+    return updated
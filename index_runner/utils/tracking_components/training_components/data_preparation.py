@@ -1,27 +1,36 @@
+from concurrent.futures import ProcessPoolExecutor
 from logging import Logger
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from os import cpu_count
 
-import yfinance as yf
+import numpy as np
 import pandas as pd
 
 from constants.enums.shift import Shift
-from constants.settings import TRAINING_DATE
-import numpy as np
+from constants.settings import TRAINING_DATE, TRAINING_WORKERS, PRICE_CACHE_ADJUSTMENT_TOLERANCE
+from utils import price_cache
+from utils.indicators.rolling_slope import slope_features, SLOPE_WINDOWS, SLOPE_SHIFTS
 from utils.logger import get_logger
+from utils.tracking_components.training_components.feature_store import feature_store, FeatureSet, FeatureStore
 
 logger: Logger = get_logger(__name__)
 
+DIRECTION_DAYS = 15  # days after a row in which the price has to rise for dir to be 1
+# prices up to and including a row which its features are taken from
+FEATURE_HISTORY = max(SLOPE_WINDOWS.values()) + SLOPE_SHIFTS - 1
+
+# prices of every stock shared with the processes generating the training data, one row per stock
+shared_prices: np.ndarray | None = None
+__shared_memory: SharedMemory | None = None
 
-def generate_data(stock_df):
+
+def generate_data(stock_df, first_row: int = 0):
     """
         stock_df should contain price as one column
+        first_row: the rows before it are only the history of the features of the later rows and are left out
     """
 
-    def get_slope(col):
-        index = list(col.index)
-        coefficient = np.polyfit(index, col.values, 1)
-        ini = coefficient[0]*index[0]+coefficient[1]
-        return coefficient[0]/ini
-
     def position(x):
         """
         given a series it finds whether there was increase of given value eg 1.05
@@ -31,34 +40,172 @@ def generate_data(stock_df):
         returns = (x.pct_change()+1).cumprod()
         return 0 if returns[returns > 1.05].shape[0] == 0 else 1
 
-    col_with_period = {
-        '6mo': 132,
-        '3mo': 66,
-        '1mo': 22,
-        '5d': 5,
-        '2d': 2
-    }
-
-    shifts = [sh for sh in range(3)]
     gen_cols = []
 
-    for shift in shifts:
-        for key, val in col_with_period.items():
-            gen_cols.append(f"{key}_{shift}")
-            stock_df.insert(
-                len(stock_df.columns),
-                f"{key}_{shift}",
-                stock_df.reset_index(drop=True).shift(shift).price.rolling(val).apply(get_slope).values
-            )
-
-    stock_df.insert(
-                len(stock_df.columns),
-                'dir',
-                stock_df.reset_index(drop=True).price.shift(-15).rolling(15).apply(lambda x: position(x)).values
-            )
+    # rolling slopes of every window and shift, each taken from cumulative sums in one pass
+    for column, values in slope_features(stock_df['price'].to_numpy()).items():
+        gen_cols.append(column)
+        stock_df.insert(len(stock_df.columns), column, values)
+
+    # the direction of a row only looks at the prices after it, so the earlier rows are not rolled over
+    # except for the window of the first row
+    direction_start = max(0, first_row - DIRECTION_DAYS + 1)
+    direction = np.full(len(stock_df), np.nan)
+    direction[direction_start:] = stock_df.reset_index(drop=True).price.iloc[direction_start:] \
+        .shift(-DIRECTION_DAYS).rolling(DIRECTION_DAYS).apply(lambda x: position(x)).values
+    stock_df.insert(len(stock_df.columns), 'dir', direction)
     gen_cols.append("dir")
 
-    return stock_df[gen_cols].dropna()
+    return stock_df[gen_cols].iloc[first_row:].dropna()
+
+
+def attach_prices(name: str, shape: tuple[int, int]):
+    """
+    runs once in each process generating the training data
+    :param name: name of the shared memory holding the prices
+    :param shape: stocks x days
+    :return: None
+    """
+    global shared_prices, __shared_memory
+    # the memory is kept referenced as long as the process lives, the prices are a view of it
+    __shared_memory = SharedMemory(name=name)
+    shared_prices = np.ndarray(shape, dtype=np.float64, buffer=__shared_memory.buf)
+
+
+def stock_data(task: tuple[int, int, int]) -> pd.DataFrame:
+    """
+    :param task: position of the stock in the shared prices, first day read and first day generated
+    :return: features and direction of the stock indexed by the day
+    """
+    row, start, first_row = task
+    stock_df = generate_data(pd.DataFrame({'price': shared_prices[row, start:].copy()}), first_row - start)
+    stock_df.index = stock_df.index + start
+    return stock_df
+
+
+def generate_all(prices: np.ndarray, first_rows: np.ndarray, workers: int) -> list[pd.DataFrame]:
+    """
+    The prices are copied once into shared memory and each process reads the stocks it is given from there.
+    map returns the data in the order of the stocks whichever process finishes first, so the training data and
+    the model trained on it do not depend on the number of processes.
+
+    :param prices: one row per stock and one column per day
+    :param first_rows: first day generated of each stock, only the history its features need is read before it
+    :param workers: number of processes
+    :return: features and direction of each stock in the order of the rows, indexed by the day
+    """
+    memory = SharedMemory(create=True, size=max(prices.nbytes, 1))
+    try:
+        np.ndarray(prices.shape, dtype=np.float64, buffer=memory.buf)[:] = prices
+        # spawned as tensorflow is already loaded in this process by trained_model and is not safe to fork
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"), initializer=attach_prices,
+                                 initargs=(memory.name, prices.shape)) as executor:
+            return list(executor.map(stock_data, tasks(first_rows), chunksize=max(1, len(prices) // (workers * 4))))
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def tasks(first_rows: np.ndarray) -> list[tuple[int, int, int]]:
+    """
+    :param first_rows: first day generated of each stock
+    :return: position of each stock, first day read for the history of its features and first day generated
+    """
+    return [(row, max(0, int(first_row) - FEATURE_HISTORY + 1), int(first_row))
+            for row, first_row in enumerate(first_rows)]
+
+
+def generate_stocks(prices: np.ndarray, first_rows: np.ndarray) -> list[pd.DataFrame]:
+    """
+    :param prices: one row per stock and one column per day
+    :param first_rows: first day generated of each stock
+    :return: features and direction of each stock from its first day, indexed by the day
+    """
+    workers = min(TRAINING_WORKERS, cpu_count() or 1, len(prices))
+    if workers > 1:
+        return generate_all(prices, first_rows, workers)
+
+    stock_frames = []
+    for row, start, first_row in tasks(first_rows):
+        stock_df = generate_data(pd.DataFrame({'price': prices[row, start:]}), first_row - start)
+        stock_df.index = stock_df.index + start
+        stock_frames.append(stock_df)
+    return stock_frames
+
+
+def update_features(stocks_df: pd.DataFrame, previous: FeatureSet | None, version: str) -> FeatureSet:
+    """
+    Only the rows after the last stored row of each stock are generated, the stored rows the prices still cover
+    are kept. A stock whose prices differ from the stored ones, e.g. after a split or a dividend, is generated again
+    as the features of a row depend on the prices of the days before it. The rows are ordered by stock and then by
+    day as if all of them were generated again.
+
+    :param stocks_df: prices, one column per stock
+    :param previous: latest stored version
+    :param version: training date
+    :return: rows of every stock
+    """
+    tickers = list(stocks_df.columns)
+    dates = stocks_df.index.values.astype('datetime64[D]')
+    prices = np.ascontiguousarray(stocks_df.to_numpy(dtype=np.float64).T)
+
+    first_rows = np.zeros(len(tickers), dtype=np.int64)
+    kept_stock, kept_columns, kept_dates = np.zeros(0, dtype=np.int32), {}, np.zeros(0, dtype='datetime64[D]')
+    kept_prices = np.zeros(0)
+    if previous is not None and len(previous) and len(dates):
+        positions = {ticker: position for position, ticker in enumerate(tickers)}
+        stored_stock = np.array([positions.get(ticker, -1) for ticker in previous.tickers])[previous.stock]
+        stored_dates = np.asarray(previous.date)
+        rows = np.searchsorted(dates, stored_dates)
+        # a stored row is kept if its stock and day are still in the prices, with the full history of its features
+        kept = (stored_stock >= 0) & (rows >= FEATURE_HISTORY - 1) & (rows < len(dates))
+        kept[kept] = dates[rows[kept]] == stored_dates[kept]
+        stored_prices = np.asarray(previous.price)
+        changed = kept & ~np.isclose(prices[np.maximum(stored_stock, 0), np.minimum(rows, len(dates) - 1)],
+                                     stored_prices, rtol=PRICE_CACHE_ADJUSTMENT_TOLERANCE, atol=0)
+        if changed.any():
+            adjusted = np.unique(stored_stock[changed])
+            logger.info(f"prices adjusted since they were stored, generating again {[tickers[i] for i in adjusted]}")
+            kept &= ~np.isin(stored_stock, adjusted)
+        np.maximum.at(first_rows, stored_stock[kept], rows[kept] + 1)
+        kept_stock, kept_dates = stored_stock[kept].astype(np.int32), stored_dates[kept]
+        kept_prices = stored_prices[kept]
+        kept_columns = {name: np.asarray(values)[kept] for name, values in previous.columns.items()}
+
+    stock_frames = generate_stocks(prices, first_rows)
+    generated_stock = np.repeat(np.arange(len(tickers), dtype=np.int32), [len(frame) for frame in stock_frames])
+    generated_rows = np.concatenate([frame.index.to_numpy(dtype=np.int64) for frame in stock_frames]
+                                    or [np.zeros(0, dtype=np.int64)])
+    logger.info(f"training data {version}: {len(kept_stock)} rows kept, {len(generated_stock)} rows generated")
+
+    # stable so that the kept rows of a stock come before its generated ones
+    order = np.argsort(np.concatenate([kept_stock, generated_stock]), kind='stable')
+    columns = {}
+    for name in (stock_frames[0].columns if stock_frames else []):
+        generated = np.concatenate([frame[name].to_numpy(dtype=np.float64) for frame in stock_frames])
+        columns[name] = np.concatenate([kept_columns.get(name, np.zeros(0)), generated])[order]
+    return FeatureSet(
+        version=version,
+        tickers=tickers,
+        columns=columns,
+        stock=np.concatenate([kept_stock, generated_stock])[order],
+        date=np.concatenate([kept_dates, dates[generated_rows]])[order],
+        price=np.concatenate([kept_prices, prices[generated_stock, generated_rows]])[order]
+    )
+
+
+def stored_training_data(shift: Shift, version: str | None = None) -> FeatureSet | None:
+    """
+    stored training data, e.g. for evaluating a model offline, nothing is downloaded
+    :param shift: shift
+    :param version: training date e.g. 2024-11-13, the latest one if not given
+    :return: the memory mapped rows, None if the version is not stored
+    """
+    key = FeatureStore.key(shift)
+    if version is None:
+        versions = feature_store.versions(key)
+        return feature_store.load(key, versions[-1]) if versions else None
+    return feature_store.load(key, version)
 
 
 def training_data(non_be_tickers: list, shift: Shift):
@@ -67,7 +214,17 @@ def training_data(non_be_tickers: list, shift: Shift):
     :return:
     """
 
-    stocks_df = yf.download(tickers=non_be_tickers, interval='1d', period='1y')
+    # the training data of the day is stored once, the data of a new day only adds the rows of that day and of the
+    # stocks which joined, update_features drops the stocks which are no longer asked for
+    key = FeatureStore.key(shift)
+    version = str(TRAINING_DATE.date())
+    previous = feature_store.latest(key, version)
+    # a version of the day generated for other stocks is reconciled like the one of an earlier day
+    if previous is not None and previous.version == version and set(previous.tickers) == set(non_be_tickers):
+        logger.info(f"training data {key}/{version} loaded from the feature store")
+        return previous.frame() if len(previous.tickers) else None
+
+    stocks_df = price_cache.download(tickers=non_be_tickers, interval='1d', period='1y')
     stocks_df.index = pd.to_datetime(stocks_df.index)
     stocks_df = stocks_df.loc[:str(TRAINING_DATE)]
     if shift == Shift.MORNING:
@@ -75,17 +232,8 @@ def training_data(non_be_tickers: list, shift: Shift):
     elif shift == Shift.EVENING:
         stocks_df = stocks_df['Close'].bfill().ffill().dropna(axis=1)
 
-    stocks_list = list(stocks_df.columns)
-
     # generating the dataframe having both the input and output
-
-    data_df = None
-    for st in stocks_list:
-        stock_df = stocks_df[[st]]
-        stock_df.columns = ['price']
-        if data_df is not None:
-            data_df = pd.concat([data_df, generate_data(stock_df)]).reset_index(drop=True)
-        else:
-            data_df = generate_data(stock_df)
-    return data_df
+    features = update_features(stocks_df, previous, version)
+    feature_store.save(key, features)
+    return features.frame() if len(features.tickers) else None
 
@@ -0,0 +1,93 @@
+"""
+    Exports the keras models and their mu and sigma to the npz read by DenseModel, so the runner does not load keras.
+
+    run from index_runner: python -m utils.tracking_components.training_components.export_model
+"""
+from logging import Logger
+from os import getcwd
+import pickle
+
+import numpy as np
+from keras.layers import Dense
+from keras.models import load_model
+
+from constants.enums.shift import Shift
+from utils.logger import get_logger
+from utils.tracking_components.dense_model import DenseModel, model_path
+
+logger: Logger = get_logger(__name__)
+
+# largest difference allowed between the probabilities of keras and of numpy, keras computes in float32
+TOLERANCE = 1e-5
+
+
+def to_dense_model(model, params) -> DenseModel:
+    """
+    :param model: keras model made of Dense layers, the other layers e.g. Dropout do nothing while predicting
+    :param params: mu and sigma of the training data, the last entry being the target dir
+    :return: the same network in numpy
+    """
+    mu, sigma = params
+    mu = mu.iloc[:-1]
+    sigma = sigma.iloc[:-1]
+
+    layers = [layer for layer in model.layers if isinstance(layer, Dense)]
+    weights, biases = zip(*[layer.get_weights() for layer in layers])
+    return DenseModel(
+        features=list(mu.index),
+        mu=mu.to_numpy(),
+        sigma=sigma.reindex(mu.index).to_numpy(),
+        weights=list(weights),
+        biases=list(biases),
+        activations=[layer.get_config()["activation"] for layer in layers]
+    )
+
+
+def validate(model, params, dense_model: DenseModel, samples: int = 10000, seed: int = 100) -> float:
+    """
+    :param model: keras model
+    :param params: mu and sigma of the training data
+    :param dense_model: the exported model
+    :param samples: number of random stocks scored, the features are drawn around mu
+    :param seed: seed of the random features
+    :return: largest difference between the probabilities of keras and of numpy
+    """
+    mu, sigma = dense_model.mu, dense_model.sigma
+    rng = np.random.default_rng(seed)
+    features = mu + sigma * rng.normal(0, 2, (samples, len(mu)))
+
+    expected = np.asarray(model.predict((features - mu) / sigma, verbose=0), dtype=np.float64)[:, 0]
+    difference = float(np.max(np.abs(dense_model.predict(features) - expected)))
+    if difference > TOLERANCE:
+        raise ValueError(f"numpy model differs from keras by {difference}")
+    return difference
+
+
+def export_model(model, params, shift: Shift) -> DenseModel:
+    """
+    writes the numpy model of the shift once it gives the same probabilities as keras
+    :param model: keras model
+    :param params: mu and sigma of the training data
+    :param shift: shift the model predicts for
+    :return: the exported model
+    """
+    dense_model = to_dense_model(model, params)
+    difference = validate(model, params, dense_model)
+    dense_model.save(model_path(shift))
+    logger.info(f"{dense_model} exported for {shift.value}, largest difference from keras {difference}")
+    return dense_model
+
+
+def export_saved_model(shift: Shift) -> DenseModel:
+    """
+    :param shift: shift the model predicts for
+    :return: the exported model of the h5 and pkl saved by train_model
+    """
+    model = load_model(getcwd() + f"/temp/DNN_model_{shift.value.lower()}.h5")
+    params = pickle.load(open(getcwd() + f"/temp/params_{shift.value.lower()}.pkl", "rb"))
+    return export_model(model, params, shift)
+
+
+if __name__ == "__main__":
+    for saved_shift in Shift:
+        export_saved_model(saved_shift)
@@ -0,0 +1,139 @@
+import json
+from dataclasses import dataclass
+from logging import Logger
+from os import getcwd, listdir, makedirs, path as os_path, replace
+from shutil import rmtree
+
+import numpy as np
+import pandas as pd
+
+from constants.enums.shift import Shift
+from constants.settings import CURRENT_STOCK_EXCHANGE, FEATURE_STORE_PATH, FEATURE_STORE_VERSIONS
+from utils.logger import get_logger
+
+logger: Logger = get_logger(__name__)
+
+
+@dataclass
+class FeatureSet:
+    version: str  # training date e.g. 2024-11-13
+    tickers: list[str]  # stocks of the rows e.g. RELIANCE.NS
+    columns: dict[str, np.ndarray]  # features and dir in the order of the model inputs
+    stock: np.ndarray  # position in tickers of the stock of each row
+    date: np.ndarray  # day of each row
+    price: np.ndarray  # price of the stock on the day of each row, tells whether the prices were adjusted since
+
+    def __len__(self) -> int:
+        return len(self.stock)
+
+    def frame(self) -> pd.DataFrame:
+        """
+        :return: the rows as training_data gives them, each column is the mapped array itself so nothing is read into
+            memory till it is used, and the frame is read only when the version was loaded with mmap
+        """
+        # not copied, a column per block instead of a single block of all the columns
+        return pd.DataFrame(self.columns, copy=False)
+
+
+class FeatureStore:
+    """
+        Training data of each shift of the exchange, versioned by the training date.
+
+        A version is a directory with one npy file per column, so the training and the offline evaluation map only
+        the columns they read into memory. Versions are never modified, the data of a new day is written as a new
+        version and the oldest ones are removed. The stocks are not part of the key, a version keeps the stocks it was
+        generated for and update_features reconciles them with the stocks of the next day.
+    """
+
+    def __init__(self, root: str):
+        """
+        :param root: directory of the versions
+        """
+        self.root = root
+
+    @staticmethod
+    def key(shift: Shift, exchange: str = CURRENT_STOCK_EXCHANGE) -> str:
+        """
+        :param shift: shift the data is for
+        :param exchange: exchange of the stocks
+        :return: name of the directory of the versions of the shift
+        """
+        return f"{shift.value.lower()}_{exchange.lower()}"
+
+    def __path(self, key: str, version: str) -> str:
+        return f"{self.root}/{key}/{version}"
+
+    def versions(self, key: str) -> list[str]:
+        """
+        :param key: shift and exchange
+        :return: versions stored, oldest first
+        """
+        if not os_path.isdir(f"{self.root}/{key}"):
+            return []
+        return sorted(version for version in listdir(f"{self.root}/{key}") if not version.endswith(".tmp"))
+
+    def load(self, key: str, version: str, mmap: bool = True) -> FeatureSet | None:
+        """
+        :param key: shift and exchange
+        :param version: training date
+        :param mmap: whether the columns are mapped instead of read into memory
+        :return: the version, None if it is not stored
+        """
+        path = self.__path(key, version)
+        try:
+            with open(f"{path}/meta.json") as file:
+                meta = json.load(file)
+            mmap_mode = "r" if mmap else None
+            return FeatureSet(
+                version=version,
+                tickers=meta["tickers"],
+                columns={name: np.load(f"{path}/columns/{name}.npy", mmap_mode=mmap_mode) for name in meta["columns"]},
+                stock=np.load(f"{path}/stock.npy", mmap_mode=mmap_mode),
+                date=np.load(f"{path}/date.npy", mmap_mode=mmap_mode),
+                price=np.load(f"{path}/price.npy", mmap_mode=mmap_mode)
+            )
+        except FileNotFoundError:
+            return None
+        except:
+            logger.exception(f"discarding the training data {key}/{version}")
+            return None
+
+    def latest(self, key: str, version: str, mmap: bool = True) -> FeatureSet | None:
+        """
+        :param key: shift and exchange
+        :param version: training date
+        :param mmap: whether the columns are mapped instead of read into memory
+        :return: the latest version up to the training date, None if there is none
+        """
+        for stored in reversed(self.versions(key)):
+            if stored <= version:
+                return self.load(key, stored, mmap)
+        return None
+
+    def save(self, key: str, features: FeatureSet) -> None:
+        """
+        writes the version, replacing it if it is stored, and removes the versions older than the latest
+        FEATURE_STORE_VERSIONS
+        :param key: shift and exchange
+        :param features: rows of the version
+        :return: None
+        """
+        path = self.__path(key, features.version)
+        # written to a temporary directory first so that a crash never leaves a broken version
+        rmtree(path + ".tmp", ignore_errors=True)
+        makedirs(path + ".tmp/columns")
+        for name, values in features.columns.items():
+            np.save(f"{path}.tmp/columns/{name}.npy", np.asarray(values))
+        np.save(f"{path}.tmp/stock.npy", np.asarray(features.stock))
+        np.save(f"{path}.tmp/date.npy", np.asarray(features.date))
+        np.save(f"{path}.tmp/price.npy", np.asarray(features.price))
+        with open(f"{path}.tmp/meta.json", "w") as file:
+            json.dump({"tickers": features.tickers, "columns": list(features.columns), "rows": len(features)}, file)
+        rmtree(path, ignore_errors=True)
+        replace(path + ".tmp", path)
+
+        for version in self.versions(key)[:-FEATURE_STORE_VERSIONS]:
+            rmtree(self.__path(key, version), ignore_errors=True)
+
+
+feature_store = FeatureStore(getcwd() + FEATURE_STORE_PATH)
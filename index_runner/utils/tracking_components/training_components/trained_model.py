@@ -17,6 +17,7 @@ from constants.enums.shift import Shift
 from constants.settings import YFINANCE_EXTENSION
 from utils.logger import get_logger
 from utils.tracking_components.training_components.data_preparation import training_data
+from utils.tracking_components.training_components.export_model import export_model
 
 logger: Logger = get_logger(__name__)
 
@@ -45,8 +46,9 @@ def split_data(split_ratio: float, data_df: pd.DataFrame, shift: Shift):
 
     """
     split_index = int(len(data_df) * split_ratio)
-    train = data_df.iloc[:split_index].copy()
-    test = data_df.iloc[split_index:].copy()
+    # the rows stay mapped from the feature store, only the normalised rows fed to the model are held in memory
+    train = data_df.iloc[:split_index]
+    test = data_df.iloc[split_index:]
 
     # normalising the data
     mu, sigma = train.mean(), train.std()
@@ -131,6 +133,9 @@ def train_model(stock_list, shift: Shift):
 
     logger.info(f"model saved: {model}")
 
+    # the runner predicts with the numpy copy of the model
+    export_model(model, (train.mean(), train.std()), shift)
+
     logger.info(test_s)
     test_s["prediction"] = model.predict(test_s[features])
 
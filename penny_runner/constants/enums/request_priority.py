@@ -0,0 +1,11 @@
+from enum import Enum
+
+
+class RequestPriority(Enum):
+    """
+        priority of a kite request, lower value is served first
+    """
+    ORDER = 0
+    EXIT_QUOTE = 1
+    ENTRY_QUOTE = 2
+    UNIVERSE_LTP = 3
@@ -2,24 +2,35 @@ import asyncio
 import os
 from asyncio import sleep
 from datetime import datetime
+from time import monotonic
 from logging import Logger
 import sys
-import yfinance as yf
 import pandas as pd
 
+from constants.enums.request_priority import RequestPriority
 from constants.enums.shift import Shift
 from constants.settings import STOCK_LOWER_PRICE, STOCK_UPPER_PRICE, set_wallet_value, get_allocation, \
     YFINANCE_EXTENSION, TRAINING_DATE, DEBUG, get_wallet_value, START_TIME, SLEEP_INTERVAL, END_TIME, end_process, \
     set_end_process, STOP_BUYING_TIME_MORNING, START_BUYING_TIME_MORNING, STOP_BUYING_TIME_EVENING, \
-    START_BUYING_TIME_EVENING, set_max_stocks, get_max_stocks, CURRENT_STOCK_EXCHANGE, EXPECTED_MINIMUM_MONTHLY_RETURN
+    START_BUYING_TIME_EVENING, set_max_stocks, get_max_stocks, CURRENT_STOCK_EXCHANGE, EXPECTED_MINIMUM_MONTHLY_RETURN, \
+    PREDICTION_WINDOW, SNAPSHOT_PATH, EXPORT_PREDICTION_CSV, DAILY_PATTERN_SCREEN, TODAY, \
+    STOP_LOSS_CHECK_INTERVAL
 from constants.global_contexts import set_access_token
 from models.account import Account
 from models.db_models.db_functions import retrieve_all_services, find_by_name
 from models.stages.position import Position
 from models.stock_info import StockInfo
 from models.wallet import Wallet
+from utils.kite_scheduler import kite_scheduler
+from utils import price_cache
 from utils.logger import get_logger
 from utils.tracking_components.fetch_prices import fetch_current_prices
+from utils.tracking_components.price_buffer import PriceRingBuffer, value_at_risk
+from utils.tracking_components.price_feed import PriceFeed
+from utils.tracking_components.snapshot_log import SnapshotLog
+from utils.tracking_components.tick_store import tick_store
+from utils.tracking_components.depth_snapshot import depth_snapshot
+from utils.tracking_components.pattern_screen import screen_universe
 from utils.tracking_components.verify_symbols import get_correct_symbol
 from utils.financials.checks import eps_and_sales_check, low_pe_check, decreasing_stocks_high_eps
 
@@ -34,6 +45,34 @@ set_access_token(access_token=access_token)
 set_wallet_value(amount=wallet_value_params)
 
 
+# exit price of each position at which the feed ended the last sleep, so that a position which could not be sold
+# does not end every sleep till its exit price moves
+exit_alerts: dict[str, float] = {}
+
+
+async def sleep_till_exit(seconds: float, positions: dict[str, Position], price_feed: PriceFeed):
+    """
+    sleeps till the next iteration, checking the ticks of the positions every STOP_LOSS_CHECK_INTERVAL so that a
+    position whose price falls below its exit price is sold in the next iteration instead of after the whole interval
+    :param seconds: seconds till the next iteration
+    :param positions: positions of the account
+    :param price_feed: websocket prices, the positions without a price in it are only checked by the iteration
+    :return: None
+    """
+    deadline = monotonic() + seconds
+    while (remaining := deadline - monotonic()) > 0:
+        await sleep(min(STOP_LOSS_CHECK_INTERVAL, remaining))
+        for position_name, position in list(positions.items()):
+            price, exit_price = price_feed.last_price(position_name), position.exit_price()
+            if price is None or exit_price is None or price >= exit_price:
+                continue
+            if exit_alerts.get(position_name) == exit_price:
+                continue
+            exit_alerts[position_name] = exit_price
+            logger.info(f"{position_name} ticked at {price} below its exit price {exit_price}, checking the positions")
+            return
+
+
 async def background_task():
     """
         all the tasks mentioned here will be running in the background
@@ -52,6 +91,10 @@ async def background_task():
     logger.info(f"listed of stocks : {obtained_stock_list}")
 
     not_loaded = True
+
+    # websocket feed keeping the last traded price of all the filtered stocks
+    price_feed = PriceFeed()
+
     # filtered stocks contains all stocks in prediction_df with .NS removed
     filtered_stocks, selected_long_stocks, selected_short_stocks = [], [], []
 
@@ -78,7 +121,7 @@ async def background_task():
     day_based_price_df = None
 
     try:
-        day_based_price_df = yf.download(tickers=[f"{st}.{YFINANCE_EXTENSION}"for st in obtained_stock_list], period='1y', interval='1d')[['Close', 'High', 'Low', 'Open']]
+        day_based_price_df = price_cache.download(tickers=[f"{st}.{YFINANCE_EXTENSION}"for st in obtained_stock_list], period='1y', interval='1d')[['Close', 'High', 'Low', 'Open']]
         day_based_price_df = day_based_price_df.ffill().bfill()
         day_based_price_df.index = pd.to_datetime(day_based_price_df.index)
         day_based_price_df = day_based_price_df.loc[:str(TRAINING_DATE.date())]
@@ -93,7 +136,7 @@ async def background_task():
 
     # loading day based price df from yahoo finance
     try:
-        prediction_df = yf.download(tickers=[f"{st}.{YFINANCE_EXTENSION}"for st in obtained_stock_list], period='5d', interval='1m')['Close']
+        prediction_df = price_cache.download(tickers=[f"{st}.{YFINANCE_EXTENSION}"for st in obtained_stock_list], period='5d', interval='1m')['Close']
         prediction_df = prediction_df.ffill().bfill()
         prediction_df.index = pd.to_datetime(prediction_df.index)
         prediction_df = prediction_df.loc[:str(TRAINING_DATE.date())]
@@ -125,6 +168,18 @@ async def background_task():
 
     logger.info(prediction_df)
 
+    # intraday prices of all the stocks, appended every interval
+    # on a restart the prices already collected today are reloaded from the snapshot log, named by the trading day
+    snapshot_log = SnapshotLog(os.getcwd() + SNAPSHOT_PATH + f"/prediction_{TODAY.date()}.bin",
+                               export_path="temp/prediction_df.csv" if EXPORT_PREDICTION_CSV else None)
+    prediction_buffer = snapshot_log.load(PREDICTION_WINDOW)
+    if prediction_buffer is not None:
+        logger.info(f"intraday prices reloaded from the snapshot: {len(prediction_buffer)} rows")
+    elif prediction_df is not None:
+        prediction_buffer = PriceRingBuffer.from_frame(prediction_df, PREDICTION_WINDOW)
+        snapshot_log.record(prediction_buffer)
+    snapshot_log.start(PREDICTION_WINDOW)
+
     # loading all holdings and stocks into a list to compare what has been sold at the end
     # these are just used for verification at the end
 
@@ -142,6 +197,15 @@ async def background_task():
 
     blacklisted_stocks = []
 
+    # the daily candles of all the stocks are scanned together, the ones ruled out are not quoted during the day
+    screened_out_stocks: set[str] = set()
+    if DAILY_PATTERN_SCREEN and day_based_price_df is not None:
+        try:
+            daily_screen = screen_universe(day_based_price_df)
+            screened_out_stocks.update(daily_screen.index[~daily_screen["eligible"]])
+        except:
+            logger.exception("error while screening the daily candles, no stock is ruled out")
+
     eps_check_result = await decreasing_stocks_high_eps()
 
     # this part will loop till the trading times end
@@ -152,7 +216,7 @@ async def background_task():
 
         # if the trading has not started then iterate every 1 sec else iterate every 30 sec
         if START_TIME < current_time:
-            await sleep(SLEEP_INTERVAL)
+            await sleep_till_exit(SLEEP_INTERVAL, account.positions, price_feed)
         else:
             await sleep(1)
 
@@ -160,11 +224,15 @@ async def background_task():
         try:
 
             if not_loaded and current_time >= START_TIME:
-                filtered_stocks = [i[:-3] for i in list(prediction_df.columns)]
+                filtered_stocks = [i[:-3] for i in prediction_buffer.columns]
 
                 logger.info(f"list of filtered stocks: {filtered_stocks}")
                 not_loaded = False
 
+                if not DEBUG:
+                    # the positions carried from the earlier days are subscribed too for their stop loss
+                    price_feed.start(filtered_stocks + [st for st in account.positions if st not in filtered_stocks])
+
             if end_process():
                 break
 
@@ -173,26 +241,26 @@ async def background_task():
             """
 
             if START_TIME < current_time:
-                # update the prediction_df after every interval
-                new_cost_df = await fetch_current_prices(filtered_stocks)
+                # update the prediction buffer after every interval
+                new_cost_df = None if DEBUG else price_feed.current_prices(filtered_stocks)
+                # the stocks without a recent tick are polled, all of them while the ticker is disconnected
+                stale_stocks = filtered_stocks if DEBUG else price_feed.stale_symbols(filtered_stocks)
+                if stale_stocks:
+                    polled_df = await fetch_current_prices(stale_stocks)
+                    if polled_df is not None:
+                        new_cost_df = polled_df if new_cost_df is None else pd.concat([new_cost_df, polled_df], axis=1)
                 # the if condition is for the debug process
                 if new_cost_df is None:
                     set_end_process(True)
                 else:
-                    prediction_df = pd.concat([prediction_df, new_cost_df], ignore_index=True)
-                    prediction_df = prediction_df.bfill().ffill()
-                    prediction_df.dropna(axis=1, inplace=True)
-                    prediction_df = prediction_df[[col for col in list(prediction_df.columns) if '-BE' not in col]]
-                    prediction_df = prediction_df.iloc[-2000:]
-                    prediction_df = prediction_df.reset_index(drop=True)
-                    price_filter = list(prediction_df.iloc[-1][prediction_df.iloc[-1] < 30].index)
-                    prediction_df = prediction_df[price_filter]
-                    prediction_df.to_csv(f"temp/prediction_df.csv")
+                    prediction_buffer.append(new_cost_df)
+                    prediction_buffer.keep([col for col in prediction_buffer.columns if '-BE' not in col])
+                    price_filter = [col for col, price in zip(prediction_buffer.columns, prediction_buffer.last()) if price < 30]
+                    prediction_buffer.keep(price_filter)
+                    snapshot_log.record(prediction_buffer)
 
                 # # listing those stocks first with less VaR
-                data_resampled = prediction_df.iloc[::60, :]
-                log_returns = data_resampled.pct_change()
-                VaR_95 = log_returns.quantile(0.005, interpolation='lower')
+                VaR_95 = value_at_risk(prediction_buffer.window(), prediction_buffer.columns, step=60, quantile=0.005)
 
                 filtered_stock_list = [f"{st}.NS" for st in eps_check_result]
 
@@ -206,11 +274,26 @@ async def background_task():
 
                 logger.info(f"list of the stocks to track: {account.stocks_to_track.keys()}")
 
+                # depth of every stock which can be quoted in this tick is fetched together,
+                # all the get_quote calls of this tick are served from it
+                if not DEBUG:
+                    stocks_to_enter = []
+                    if (STOP_BUYING_TIME_MORNING > current_time > START_BUYING_TIME_MORNING) or (STOP_BUYING_TIME_EVENING > current_time > START_BUYING_TIME_EVENING):
+                        stocks_to_enter = [st for st in selected_long_stocks
+                                           if st not in blacklisted_stocks and st not in screened_out_stocks]
+                    await asyncio.gather(
+                        depth_snapshot.refresh(list(account.positions.keys()), priority=RequestPriority.EXIT_QUOTE),
+                        depth_snapshot.refresh(
+                            [st for st in list(account.stocks_to_track.keys()) + stocks_to_enter if st not in account.positions],
+                            priority=RequestPriority.ENTRY_QUOTE
+                        )
+                    )
+
                 if (STOP_BUYING_TIME_MORNING > current_time > START_BUYING_TIME_MORNING) or (STOP_BUYING_TIME_EVENING > current_time > START_BUYING_TIME_EVENING):
 
                     # selecting stock which meets the criteria
                     for stock_col in selected_long_stocks:
-                        if stock_col not in blacklisted_stocks:
+                        if stock_col not in blacklisted_stocks and stock_col not in screened_out_stocks:
                             # available cash keeps on changing so max_stocks keeps on changing
                             # the stock will be added if it is added for the first time
                             set_max_stocks(int(account.available_cash/get_allocation()))
@@ -231,14 +314,11 @@ async def background_task():
                                 # even if it may seem that allocation is reduced when bought, actual change is while adding the
                                 # stock in stocks to track
                                 account.available_cash -= get_allocation()
-                                stock_df = prediction_df[[f"{stock_col}.{YFINANCE_EXTENSION}"]]
-                                stock_df.reset_index(inplace=True, drop=True)
-                                stock_df = stock_df[[f"{stock_col}.{YFINANCE_EXTENSION}"]].bfill().ffill()
-                                stock_df.columns = ['price']
-                                stock_df.to_csv(f"temp/{stock_col}.csv")
+                                stock_prices = prediction_buffer.column(f"{stock_col}.{YFINANCE_EXTENSION}")
+                                tick_store.write(stock_col, stock_prices)
 
                                 logger.info("whether actually the stock df has all the data or not")
-                                logger.info(f"{stock_col}: {stock_df.shape}")
+                                logger.info(f"{stock_col}: {stock_prices.shape}")
 
                 """
                     update price for all the stocks which are being tracked
@@ -278,14 +358,14 @@ async def background_task():
                             # if its in holding then fund is added next day else for position its added same day
                             if position.stock.number_of_days == 1:
                                 account.available_cash += get_allocation()
-                            os.remove(os.getcwd() + f"/temp/{position_name}.csv")
+                            tick_store.remove(position_name)
                             today_profit += float(account.stocks_to_track[position_name].wallet)
                             positions_to_delete.append(position_name)
 
                         case "SELL_LOSS":
                             logger.info(f" loss -->sell {position.stock.stock_name} at {position.stock.latest_price}")
                             positions_to_delete.append(position_name)
-                            os.remove(os.getcwd() + f"/temp/{position_name}.csv")
+                            tick_store.remove(position_name)
                             if position.stock.number_of_days == 1:
                                 account.available_cash += get_allocation()
                             today_profit += float(account.stocks_to_track[position_name].wallet)
@@ -301,6 +381,11 @@ async def background_task():
         except:
             logger.exception("Kite error may have happened")
 
+    price_feed.stop()
+    snapshot_log.stop()
+
+    logger.info(f"kite requests: {kite_scheduler.metrics()}")
+
     # sell all the stocks which has trigger and is not None
 
     positions_to_delete = []  # this is needed or else it will alter the length during loop
@@ -343,7 +428,7 @@ async def background_task():
         del account.positions[position_name]
         if account.stocks_to_track[position_name].wallet > 0:
             del account.stocks_to_track[position_name]  # delete from stocks to track
-            os.remove(os.getcwd() + f"/temp/{position_name}.csv")
+            tick_store.remove(position_name)
 
     sorted_wallet_list = list(wallet_order.keys())
 
@@ -376,7 +461,7 @@ async def background_task():
 
     for position_name in positions_to_delete:
         del account.positions[position_name]
-        os.remove(os.getcwd() + f"/temp/{position_name}.csv")
+        tick_store.remove(position_name)
 
     """
         END OF DAY ACTIVITIES
@@ -1,4 +1,3 @@
-import os
 from dataclasses import dataclass, field
 from logging import Logger
 
@@ -6,13 +5,14 @@ from constants.enums.position_type import PositionType
 from constants.enums.product_type import ProductType
 from constants.enums.shift import Shift
 from constants.settings import DEBUG, STARTING_CASH, get_allocation, MAXIMUM_ALLOWED_CASH
-from constants.global_contexts import kite_context
 from models.db_models.db_functions import retrieve_all_services, jsonify, find_by_name
 from models.stages.holding import Holding
 from models.stages.position import Position
 from models.stock_info import StockInfo
+from utils.kite_scheduler import kite_scheduler
 from utils.logger import get_logger
 from utils.take_position import long, short
+from utils.tracking_components.tick_store import tick_store
 
 logger: Logger = get_logger(__name__)
 
@@ -40,7 +40,7 @@ class Account:
 
         holdings_from_api = {}
 
-        for holding in kite_context.holdings():
+        for holding in kite_scheduler.holdings():
             holdings_from_api[holding['tradingsymbol']] = holding['average_price']
 
         for holding_obj in holding_list:
@@ -77,7 +77,7 @@ class Account:
                     if self.stocks_to_track[stock_key].first_load:
                         self.available_cash += get_allocation()
                         stocks_to_delete.append(stock_key)
-                        os.remove(os.getcwd() + f"/temp/{stock_key}.csv")
+                        tick_store.remove(stock_key)
                 else:
 
                     logger.info(f"parameters for {stock_key}: {quantity} {buy_price}")
@@ -111,7 +111,7 @@ class Account:
                         if self.stocks_to_track[stock_key].first_load:
                             self.available_cash += get_allocation()
                             stocks_to_delete.append(stock_key)
-                            os.remove(os.getcwd() + f"/temp/{stock_key}.csv")
+                            tick_store.remove(stock_key)
 
         for stock_key in stocks_to_delete:
             del self.stocks_to_track[stock_key]
@@ -48,6 +48,19 @@ class Stage:
     def incremental_return(self):
         return DELIVERY_INCREMENTAL_RETURN
 
+    def exit_price(self) -> float | None:
+        """
+            price below which a long position is sold by breached, the trailing trigger once it is set else the
+            stop loss below the last buy, None for a short position
+        """
+        if self.position_type != PositionType.LONG:
+            return None
+        if self.trigger is not None:
+            return self.trigger * (1 - self.incremental_return)
+        if self.stock.last_buy_price is None:
+            return None
+        return self.stock.last_buy_price * 0.9
+
     def set_trigger(self, stock_price: float):
         """
             in case of cumulative position the cost is given by
@@ -178,7 +191,7 @@ class Stage:
                 # if it hits trigger then square off else reset a new trigger
                 # if self.cost * (1 + self.current_expected_return + (
                 #         1 / 2) * self.incremental_return) < self.current_price < self.trigger:
-                if self.current_price < self.trigger * (1 - self.incremental_return):
+                if self.current_price < self.exit_price():
                     if DEBUG:
                         # if self.stock.stock_name in self.stock.chosen_short_stocks and self.stock.stock_name not in self.stock.chosen_long_stocks:
                         if self.sell():
@@ -190,7 +203,7 @@ class Stage:
                             if self.sell():
                                 return "SELL_PROFIT"
             else:
-                if self.current_price < self.stock.last_buy_price * 0.9:
+                if self.current_price < self.exit_price():
                     # if self.current_price < self.stock.last_buy_price * 0.99:
                     if DEBUG:
                         if self.sell():
@@ -0,0 +1,111 @@
+import numpy as np
+
+
+def depth_arrays(depths: list[list[dict]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Converts the orders of the depth into price and size matrices padded with empty levels.
+    The size of a level is taken as orders * quantity as it has been used while walking the depth.
+
+    :param depths: list of the buy or sell orders of each stock e.g. [[{'price': 10.5, 'quantity': 100, 'orders': 2}]]
+    :return: price and size matrices of shape stocks x levels
+    """
+    levels = max([len(orders) for orders in depths], default=0)
+    prices = np.zeros((len(depths), levels))
+    sizes = np.zeros((len(depths), levels))
+    for row, orders in enumerate(depths):
+        for column, item in enumerate(orders):
+            prices[row, column] = item["price"]
+            sizes[row, column] = item["orders"] * item["quantity"]
+    return prices, sizes
+
+
+def fill_price_for_quantity_batch(depths: list[list[dict]], quantities) -> np.ndarray:
+    """
+    average price at which the given quantity is filled by walking the depth of each stock
+
+    :param depths: list of the buy or sell orders of each stock
+    :param quantities: quantity to be filled for each stock
+    :return: average fill price of each stock, nan if the depth is not enough to fill the quantity
+    """
+    prices, sizes = depth_arrays(depths)
+    quantities = np.asarray(quantities, dtype=float).reshape(-1)
+    fill_prices = np.full(len(depths), np.nan)
+    if prices.shape[1] == 0:
+        return fill_prices
+
+    cum_sizes = np.cumsum(sizes, axis=1)
+    cum_costs = np.cumsum(prices * sizes, axis=1)
+
+    # the level where the quantity gets completed
+    level = np.argmax(cum_sizes >= quantities[:, None], axis=1)
+    rows = np.arange(len(depths))
+    previous_sizes = cum_sizes[rows, level] - sizes[rows, level]
+    previous_costs = cum_costs[rows, level] - prices[rows, level] * sizes[rows, level]
+    costs = previous_costs + (quantities - previous_sizes) * prices[rows, level]
+
+    # a price is given only if there is at least one share left after filling the quantity
+    filled = (quantities > 0) & (cum_sizes[:, -1] > quantities)
+    fill_prices[filled] = costs[filled] / quantities[filled]
+    return fill_prices
+
+
+def fill_for_amount_batch(depths: list[list[dict]], amounts) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Maximum quantity which can be bought with the given amount by walking the depth of each stock.
+    The walk stops at the first share which can not be bought with the remaining amount.
+
+    :param depths: list of the buy or sell orders of each stock
+    :param amounts: amount to be spent for each stock
+    :return: quantity and average fill price of each stock, 0 for both if nothing can be bought
+    """
+    prices, sizes = depth_arrays(depths)
+    amounts = np.asarray(amounts, dtype=float).reshape(-1)
+    quantities = np.zeros(len(depths), dtype=int)
+    fill_prices = np.zeros(len(depths))
+    if prices.shape[1] == 0:
+        return quantities, fill_prices
+
+    costs = prices * sizes
+    cum_sizes = np.cumsum(sizes, axis=1)
+    cum_costs = np.cumsum(costs, axis=1)
+
+    # the first level which can not be bought completely, if all the levels can be bought the last one is taken
+    exceeded = cum_costs > amounts[:, None]
+    level = np.where(exceeded.any(axis=1), np.argmax(exceeded, axis=1), prices.shape[1] - 1)
+    rows = np.arange(len(depths))
+    previous_sizes = cum_sizes[rows, level] - sizes[rows, level]
+    previous_costs = cum_costs[rows, level] - costs[rows, level]
+
+    # shares which can be bought from that level with the remaining amount
+    with np.errstate(divide='ignore', invalid='ignore'):
+        affordable = np.floor((amounts - previous_costs) / prices[rows, level])
+    affordable = np.where(prices[rows, level] > 0, affordable, sizes[rows, level])
+    level_quantities = np.clip(affordable, 0, sizes[rows, level])
+
+    total_quantities = previous_sizes + level_quantities
+    total_costs = previous_costs + level_quantities * prices[rows, level]
+
+    bought = total_quantities > 0
+    quantities[bought] = total_quantities[bought].astype(int)
+    fill_prices[bought] = total_costs[bought] / total_quantities[bought]
+    return quantities, fill_prices
+
+
+def fill_price_for_quantity(orders: list[dict], quantity: int) -> float | None:
+    """
+    :param orders: buy or sell orders of the depth
+    :param quantity: quantity to be filled
+    :return: average fill price or None if the depth is not enough to fill the quantity
+    """
+    fill_price = fill_price_for_quantity_batch([orders], [quantity])[0]
+    return None if np.isnan(fill_price) else float(fill_price)
+
+
+def fill_for_amount(orders: list[dict], amount: float) -> tuple[int, float]:
+    """
+    :param orders: buy or sell orders of the depth
+    :param amount: amount to be spent
+    :return: quantity and average fill price, 0 for both if nothing can be bought
+    """
+    quantities, fill_prices = fill_for_amount_batch([orders], [amount])
+    return int(quantities[0]), float(fill_prices[0])
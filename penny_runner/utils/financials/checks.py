@@ -1,15 +1,15 @@
 import pandas as pd
 from logging import Logger
+from utils import price_cache
 from utils.logger import get_logger
 from datetime import datetime, timedelta
-import yfinance as yf
 import re
 import numpy as np
 
 from models.financial import Financial
 from models.db_models.db_functions import retrieve_all_services
 from constants.settings import TODAY, TRAINING_DATE
-from utils.indicators.kaufman_indicator import kaufman_indicator
+from utils.indicators.kaufman_indicator import kaufman_indicator_batch
 from constants.settings import YFINANCE_EXTENSION
 
 logger: Logger = get_logger(__name__)
@@ -109,6 +109,8 @@ def get_quarters():
 async def low_pe_check(stock_list: list, price_df: pd.DataFrame):
     financial_list: list[Financial] = await retrieve_all_services("financial", Financial)
     filters = []
+    # pe of each stock, the kaufman line of all of them is computed together afterwards
+    pe_series = {}
     for f in financial_list:
         if f.name in stock_list:
             eps_ttm = [sum(f.eps[i - 3:i + 1]) if i + 1 > 3 else 0 for i in range(len(f.eps))]
@@ -128,16 +130,18 @@ async def low_pe_check(stock_list: list, price_df: pd.DataFrame):
                 stock_df["pe"] = stock_df[f"{f.name}_x"] / stock_df[f"{f.name}_y"]
 
                 stock_df.reset_index(inplace=True)
-                pe_df = stock_df[["pe"]]
-                pe_df.columns = ["price"]
-                pe_df['line'] = pe_df.apply(kaufman_indicator)
-                pe_df['ema'] = pe_df.line.ewm(span=5, adjust=False).mean()
-                # logger.info(regression_line(pe_df['line'].dropna().values))
-                if 0 > regression_line(pe_df['line'].dropna().values):
-
-                    # if pe_df['ema'].iloc[-1] > pe_df['ema'].iloc[-3] < pe_df['ema'].iloc[-8]:
-                    if 10 < stock_df["pe"].iloc[-1] < 25:
-                        filters.append(f.name)
+                pe_series[f.name] = stock_df["pe"]
+
+    # shorter series are padded with nan at the end which does not change the line of the earlier values
+    pe_matrix = pd.DataFrame(pe_series)
+    lines = kaufman_indicator_batch(pe_matrix)
+    for column, name in enumerate(pe_matrix.columns):
+        pe = pe_series[name]
+        line = lines[:len(pe), column]
+        # logger.info(regression_line(line[~np.isnan(line)]))
+        if 0 > regression_line(line[~np.isnan(line)]):
+            if 10 < pe.iloc[-1] < 25:
+                filters.append(name)
     logger.info(filters)
     return filters
 
@@ -182,7 +186,7 @@ async def decreasing_stocks_high_eps():
 
     financial_list: list[Financial] = await retrieve_all_services("financial", Financial)
     day_based_price_df = \
-    yf.download(tickers=[f"{f.name}.{YFINANCE_EXTENSION}" for f in financial_list], period='6mo', interval='1d')[
+    price_cache.download(tickers=[f"{f.name}.{YFINANCE_EXTENSION}" for f in financial_list], period='6mo', interval='1d')[
         'Close']
     day_based_price_df = day_based_price_df.ffill().bfill()
     day_based_price_df.index = pd.to_datetime(day_based_price_df.index)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from .patterns.candlestick_finder import CandlestickFinder
+
+
+class PatternScanner:
+    """
+        Finds many candlestick patterns over the same candles in one pass.
+
+        The candles are validated and converted once for all the patterns and the result is one uint32 per candle
+        in which bit i is set when the i-th pattern ends at that candle, so a set of patterns is checked with a mask.
+    """
+
+    def __init__(self, patterns):
+        """
+        :param patterns: classes or objects of the patterns, at most 32, the position of each is its bit
+        """
+        if len(patterns) > 32:
+            raise Exception('At most 32 patterns can be scanned together')
+        self.patterns: list[CandlestickFinder] = [pattern() if isinstance(pattern, type) else pattern
+                                                  for pattern in patterns]
+        self.required_count = max(pattern.required_count for pattern in self.patterns)
+
+    def mask(self, patterns) -> int:
+        """
+        :param patterns: classes of the patterns scanned
+        :return: bits of those patterns in the result of scan
+        """
+        classes = [pattern.__class__ for pattern in self.patterns]
+        return sum(1 << classes.index(pattern) for pattern in set(patterns))
+
+    def scan(self, candles_df, ohlc, is_reversed=False, last_n=None) -> np.ndarray:
+        """
+        :param candles_df: candles of the stock
+        :param ohlc: names of the open, high, low and close columns
+        :param is_reversed: whether the candles following a row are taken as the previous ones
+        :param last_n: if given only the latest last_n candles are checked, along with the candles they need before
+                       them, so the cost does not grow with the history
+        :return: uint32 bits of the patterns ending at each candle, or at each of the latest last_n candles,
+                 a candle without enough candles for a pattern does not have its bit
+        """
+        self.__validate(candles_df, ohlc, candles_df.columns if isinstance(candles_df, pd.DataFrame) else None)
+
+        if last_n is not None:
+            # the patterns of a candle only depend on the required_count - 1 candles next to it
+            candles_df = candles_df.iloc[-(last_n + self.required_count - 1):]
+        values = self.__to_float(candles_df[list(ohlc)])
+
+        return self.__scan(values, is_reversed, last_n)
+
+    def scan_universe(self, candles_df, ohlc, is_reversed=False, last_n=None) -> pd.DataFrame:
+        """
+        scans every stock of the frame together as one (candles, stocks, 4) array
+        :param candles_df: candles of many stocks with (field, stock) columns e.g. ('Close', 'RELIANCE.NS')
+        :param ohlc: names of the open, high, low and close fields
+        :param is_reversed: whether the candles following a row are taken as the previous ones
+        :param last_n: if given only the latest last_n candles are checked
+        :return: uint32 bits of the patterns ending at each candle of each stock, one column per stock
+        """
+        self.__validate(candles_df, ohlc,
+                        candles_df.columns.get_level_values(0) if isinstance(candles_df, pd.DataFrame) else None)
+
+        if last_n is not None:
+            candles_df = candles_df.iloc[-(last_n + self.required_count - 1):]
+        stocks = candles_df[ohlc[0]].columns
+        values = np.stack([self.__to_float(candles_df[field].reindex(columns=stocks)) for field in ohlc], axis=-1)
+
+        bits = self.__scan(values, is_reversed, last_n)
+        return pd.DataFrame(bits, index=candles_df.index[-len(bits):], columns=stocks)
+
+    def __validate(self, candles_df, ohlc, columns):
+        if not isinstance(candles_df, pd.DataFrame):
+            raise Exception('Candles must be in Panda data frame type')
+        if not ohlc or len(ohlc) != 4:
+            raise Exception('Provide list of four elements indicating columns in strings. '
+                            'Default: [open, high, low, close]')
+        if not set(ohlc).issubset(columns):
+            raise Exception('Provided columns does not exist in given data frame')
+        if len(candles_df) < self.required_count:
+            raise Exception('Patterns require at least {0} data'.format(self.required_count))
+
+    @staticmethod
+    def __to_float(frame):
+        # only the columns which are not numbers yet are converted, one by one
+        if not all(is_numeric_dtype(dtype) for dtype in frame.dtypes):
+            frame = frame.apply(pd.to_numeric)
+        return frame.to_numpy(dtype=np.float64)
+
+    def __scan(self, values, is_reversed, last_n):
+        bits = np.zeros(values.shape[:-1], dtype=np.uint32)
+        for bit, pattern in enumerate(self.patterns):
+            found = np.zeros(values.shape[:-1], dtype=bool)
+            rows = pattern.complete_rows(len(values), is_reversed)
+            found[rows] = pattern.find(values, is_reversed)[rows]
+            bits |= found.astype(np.uint32) << np.uint32(bit)
+        return bits if last_n is None else bits[-last_n:]
@@ -5,19 +5,9 @@ class BullishHarami(CandlestickFinder):
     def __init__(self, target=None):
         super().__init__(self.get_class_name(), 2, target=target)
 
-    def logic(self, idx):
-        candle = self.data.iloc[idx]
-        prev_candle = self.data.iloc[idx + 1 * self.multi_coeff]
-
-        close = candle[self.close_column]
-        open = candle[self.open_column]
-        high = candle[self.high_column]
-        low = candle[self.low_column]
-
-        prev_close = prev_candle[self.close_column]
-        prev_open = prev_candle[self.open_column]
-        prev_high = prev_candle[self.high_column]
-        prev_low = prev_candle[self.low_column]
+    def logic(self):
+        open, high, low, close = self.candle(0)
+        prev_open, prev_high, prev_low, prev_close = self.candle(1)
 
         # return (prev_close < prev_open and
         #        abs(prev_close - prev_open) / (prev_high - prev_low) >= 0.7
@@ -25,6 +15,6 @@ class BullishHarami(CandlestickFinder):
         #        and high < prev_open
         #        and low > prev_close)
         
-        return (prev_open > prev_close and
-                prev_close <= open < close <= prev_open and
-                close - open < prev_open - prev_close)
+        return ((prev_open > prev_close) &
+                (prev_close <= open) & (open < close) & (close <= prev_open) &
+                (close - open < prev_open - prev_close))
@@ -1,7 +1,22 @@
+import numpy as np
 import pandas as pd
 from pandas.api.types import is_numeric_dtype
 
 
+def maximum(first, second):
+    """
+    element wise max(first, second) of python, i.e. first is kept when either is nan unlike np.maximum
+    """
+    return np.where(second > first, second, first)
+
+
+def minimum(first, second):
+    """
+    element wise min(first, second) of python, i.e. first is kept when either is nan unlike np.minimum
+    """
+    return np.where(second < first, second, first)
+
+
 class CandlestickFinder:
     def __init__(self, name, required_count, target=None):
         self.name = name
@@ -11,6 +26,7 @@ class CandlestickFinder:
         self.low_column = 'low'
         self.high_column = 'high'
         self.data = None
+        self.ohlc = None
         self.is_data_prepared = False
         self.multi_coeff = -1
 
@@ -22,9 +38,49 @@ class CandlestickFinder:
     def get_class_name(self):
         return self.__class__.__name__
 
-    def logic(self, row_idx):
+    def logic(self):
+        """
+        :return: boolean array telling whether the pattern ends at each candle, built from the arrays of candle()
+        """
         raise Exception('Implement the logic of ' + self.get_class_name())
 
+    def candle(self, shift=0):
+        """
+        :param shift: number of candles before the current one, after it if the search is reversed
+        :return: open, high, low and close arrays holding for every row the candle at the shift from it,
+                 nan where there is no such candle. the rows are along the first axis of self.ohlc and
+                 open, high, low and close along the last, so many stocks can be checked together
+        """
+        shifted = np.full_like(self.ohlc, np.nan)
+        if shift == 0:
+            shifted[:] = self.ohlc
+        elif self.multi_coeff < 0:
+            shifted[shift:] = self.ohlc[:-shift]
+        else:
+            shifted[:-shift] = self.ohlc[shift:]
+        return shifted[..., 0], shifted[..., 1], shifted[..., 2], shifted[..., 3]
+
+    def complete_rows(self, rows_len, is_reversed):
+        """
+        :return: slice of the rows having enough candles before them, or after them if reversed, for the pattern
+        """
+        if is_reversed:
+            return slice(0, max(0, rows_len - self.required_count + 1))
+        return slice(self.required_count - 1, rows_len)
+
+    def find(self, ohlc, is_reversed):
+        """
+        :param ohlc: float array of the candles with open, high, low and close along its last axis
+        :param is_reversed: whether the candles following a row are taken as the previous ones
+        :return: boolean array telling whether the pattern ends at each row, checked for every row at once
+        """
+        self.ohlc = ohlc
+        self.multi_coeff = 1 if is_reversed else -1
+
+        # a division by zero gives inf or nan as it did for a single row
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.logic()
+
     def has_pattern(self,
                     candles_df,
                     ohlc,
@@ -33,34 +89,14 @@ class CandlestickFinder:
                           ohlc)
 
         if self.is_data_prepared:
-            results = []
-            rows_len = len(candles_df)
-            idxs = candles_df.index.values
-
-            if is_reversed:
-                self.multi_coeff = 1
+            found = self.find(self.ohlc, is_reversed)
 
-                for row_idx in range(rows_len - 1, -1, -1):
+            # rows without enough candles for the pattern are left as None
+            results = np.full(len(candles_df), None, dtype=object)
+            rows = self.complete_rows(len(candles_df), is_reversed)
+            results[rows] = found[rows]
 
-                    if row_idx <= rows_len - self.required_count:
-                        results.append([idxs[row_idx], self.logic(row_idx)])
-                    else:
-                        results.append([idxs[row_idx], None])
-
-            else:
-                self.multi_coeff = -1
-
-                for row in range(0, rows_len, 1):
-
-                    if row >= self.required_count - 1:
-                        results.append([idxs[row], self.logic(row)])
-                    else:
-                        results.append([idxs[row], None])
-
-            candles_df = candles_df.join(pd.DataFrame(results, columns=['row', self.target]).set_index('row'),
-                                         how='outer')
-
-            return candles_df
+            return candles_df.assign(**{self.target: results})
         else:
             raise Exception('Data is not prepared to detect patterns')
 
@@ -95,6 +131,9 @@ class CandlestickFinder:
                 if not is_numeric_dtype(self.data[self.high_column]):
                     self.data[self.high_column] = pd.to_numeric(candles_df[self.high_column])
 
+                self.ohlc = self.data[[self.open_column, self.high_column,
+                                       self.low_column, self.close_column]].to_numpy(dtype=np.float64)
+
                 self.is_data_prepared = True
             else:
                 raise Exception('{0} requires at least {1} data'.format(self.name,
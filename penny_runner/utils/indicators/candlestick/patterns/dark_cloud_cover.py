@@ -5,19 +5,9 @@ class DarkCloudCover(CandlestickFinder):
     def __init__(self, target=None):
         super().__init__(self.get_class_name(), 2, target=target)
 
-    def logic(self, idx):
-        candle = self.data.iloc[idx]
-        prev_candle = self.data.iloc[idx + 1 * self.multi_coeff]
-
-        close = candle[self.close_column]
-        open = candle[self.open_column]
-        high = candle[self.high_column]
-        low = candle[self.low_column]
-
-        prev_close = prev_candle[self.close_column]
-        prev_open = prev_candle[self.open_column]
-        prev_high = prev_candle[self.high_column]
-        prev_low = prev_candle[self.low_column]
+    def logic(self):
+        open, high, low, close = self.candle(0)
+        prev_open, prev_high, prev_low, prev_close = self.candle(1)
 
         # return prev_close > prev_open and \
         #        abs(prev_close - prev_open) / (prev_high - prev_low) >= 0.7 and \
@@ -26,9 +16,9 @@ class DarkCloudCover(CandlestickFinder):
         #        open >= prev_close and \
         #        prev_open < close < (prev_open + prev_close) / 2
 
-        return ((prev_close > prev_open) and
-                (((prev_close + prev_open) / 2) > close) and
-                (open > close) and
-                (open > prev_close) and
-                (close > prev_open) and
+        return ((prev_close > prev_open) &
+                (((prev_close + prev_open) / 2) > close) &
+                (open > close) &
+                (open > prev_close) &
+                (close > prev_open) &
                 ((open - close) / (.001 + (high - low)) > 0.6))
@@ -0,0 +1,254 @@
+from collections import deque
+
+import numpy as np
+
+NAN = float("nan")
+
+
+def divide(numerator: float, denominator: float) -> float:
+    """
+    division with the results of numpy for a zero or nan denominator i.e. inf or nan instead of an error
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(numerator) / np.float64(denominator))
+
+
+class RollingSum:
+    """
+        Sum over a fixed window updated in O(1) with the same floating point steps as pandas rolling(window).sum(),
+        i.e. compensated adds and removes and the same sum for a run of equal values.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.nobs = 0
+        self.sum = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.consecutive_same = 0
+        self.previous = None
+
+    def update(self, value: float) -> float:
+        """
+        :param value: latest value, nan is skipped as in pandas
+        :return: sum of the latest window values, nan till the window has no nan
+        """
+        if len(self.values) == self.window:
+            removed = self.values[0]
+            if removed == removed:
+                self.nobs -= 1
+                y = - removed - self.compensation_remove
+                t = self.sum + y
+                self.compensation_remove = t - self.sum - y
+                self.sum = t
+        self.values.append(value)
+
+        if self.previous is None:
+            self.previous = value
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum + y
+            self.compensation_add = t - self.sum - y
+            self.sum = t
+            self.consecutive_same = self.consecutive_same + 1 if value == self.previous else 1
+            self.previous = value
+
+        if self.nobs >= self.window:
+            # the sum of a run of equal values is taken without the floating point artifacts
+            return self.previous * self.nobs if self.consecutive_same >= self.nobs else self.sum
+        return NAN
+
+    def to_dict(self) -> dict:
+        return {
+            "window": self.window, "values": list(self.values), "nobs": self.nobs, "sum": self.sum,
+            "compensation_add": self.compensation_add, "compensation_remove": self.compensation_remove,
+            "consecutive_same": self.consecutive_same, "previous": self.previous
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "RollingSum":
+        rolling_sum = cls(state["window"])
+        rolling_sum.values.extend(state["values"])
+        for key in ["nobs", "sum", "compensation_add", "compensation_remove", "consecutive_same", "previous"]:
+            setattr(rolling_sum, key, state[key])
+        return rolling_sum
+
+
+class EfficiencyRatio:
+    """
+        Efficiency ratio of kaufman i.e. |price - price n steps back| / sum of |price changes| of the last n steps.
+    """
+
+    def __init__(self, n: int = 5):
+        """
+        :param n: number of observations preceding current value
+        """
+        self.n = n
+        self.prices = deque(maxlen=n)
+        self.volatility = RollingSum(n)
+        self.vol = NAN
+        self.value = NAN
+
+    def update(self, price: float) -> float:
+        """
+        :param price: latest price
+        :return: efficiency ratio of the latest price, nan for the first n prices
+        """
+        previous = self.prices[-1] if self.prices else NAN
+        change = abs(price - self.prices[0]) if len(self.prices) == self.n else NAN
+        self.prices.append(price)
+        self.vol = self.volatility.update(abs(price - previous))
+        self.value = divide(change, self.vol)
+        return self.value
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "prices": list(self.prices), "volatility": self.volatility.to_dict(),
+                "vol": self.vol, "value": self.value}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "EfficiencyRatio":
+        ratio = cls(state["n"])
+        ratio.prices.extend(state["prices"])
+        ratio.volatility = RollingSum.from_dict(state["volatility"])
+        ratio.vol, ratio.value = state["vol"], state["value"]
+        return ratio
+
+
+class KaufmanIndicator:
+    """
+        Kaufman adaptive moving average updated one price at a time, it gives the same values as kaufman_indicator.
+    """
+
+    def __init__(self, n: int = 5, pow1: int = 1, pow2: int = 20):
+        """
+        :param n: number of observations preceding current value
+        :param pow1: the fastest period
+        :param pow2: the slowest period
+        """
+        self.n, self.pow1, self.pow2 = n, pow1, pow2
+        self.efficiency_ratio = EfficiencyRatio(n)
+        self.fastest_sc, self.slowest_sc = 2 / (pow1 + 1), 2 / (pow2 + 1)
+        self.value = 0.0
+        self.first_value = True
+
+    def update(self, price: float) -> float:
+        """
+        :param price: latest price
+        :return: latest value of the indicator
+        """
+        er = self.efficiency_ratio.update(price)
+        sc = er * (self.fastest_sc - self.slowest_sc) + self.slowest_sc
+        sc = sc * sc
+
+        # if volatility is 0, it turns out to be nan so is considered separately
+        if self.efficiency_ratio.vol == 0:
+            self.value = self.value + 1 * (price - self.value)
+        # this condition is handled if the sc is np.nan
+        elif sc != sc:
+            self.value = NAN
+        # the first value is the actual value to merge the indicator results fast
+        elif self.first_value:
+            self.value = price
+            self.first_value = False
+        else:
+            self.value = self.value + sc * (price - self.value)
+        return self.value
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "pow1": self.pow1, "pow2": self.pow2, "efficiency_ratio": self.efficiency_ratio.to_dict(),
+                "value": self.value, "first_value": self.first_value}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "KaufmanIndicator":
+        indicator = cls(state["n"], state["pow1"], state["pow2"])
+        indicator.efficiency_ratio = EfficiencyRatio.from_dict(state["efficiency_ratio"])
+        indicator.value, indicator.first_value = state["value"], state["first_value"]
+        return indicator
+
+
+class ExponentialMovingAverage:
+    """
+        Same as ewm(span=span, adjust=False).mean() updated one value at a time, nan values are not ignored.
+    """
+
+    def __init__(self, span: float):
+        self.span = span
+        self.alpha = 1. / (1. + (span - 1) / 2.)
+        self.old_wt = 1.
+        self.value = NAN
+
+    def update(self, value: float) -> float:
+        """
+        :param value: latest value
+        :return: latest average, nan till the first value which is not nan
+        """
+        if self.value == self.value:
+            self.old_wt *= 1. - self.alpha
+            if value == value:
+                # a value equal to the average leaves it as it is, to avoid numerical errors on constant series
+                if self.value != value:
+                    self.value = (self.old_wt * self.value + self.alpha * value) / (self.old_wt + self.alpha)
+                self.old_wt = 1.
+        elif value == value:
+            self.value = value
+        return self.value
+
+    def to_dict(self) -> dict:
+        return {"span": self.span, "old_wt": self.old_wt, "value": self.value}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "ExponentialMovingAverage":
+        average = cls(state["span"])
+        average.old_wt, average.value = state["old_wt"], state["value"]
+        return average
+
+
+class KaufmanTrend:
+    """
+        Kaufman line of a stock with its ema, fed with every price of the stock.
+        Only the latest values of the ema are kept as those are the only ones used for buying.
+    """
+
+    def __init__(self, span: int = 5, history: int = 6):
+        """
+        :param span: span of the ema of the kaufman line
+        :param history: number of latest ema values kept
+        """
+        self.line = KaufmanIndicator()
+        self.ema = ExponentialMovingAverage(span)
+        self.history = history
+        self.ema_values = deque(maxlen=history)
+        self.count = 0  # number of prices consumed
+
+    def update(self, price: float) -> float:
+        """
+        :param price: latest price
+        :return: latest ema of the kaufman line
+        """
+        self.ema_values.append(self.ema.update(self.line.update(price)))
+        self.count += 1
+        return self.ema_values[-1]
+
+    def sync(self, prices):
+        """
+        feeds the prices which have not been consumed yet
+        :param prices: all the prices of the stock in order
+        :return: None
+        """
+        for price in prices[self.count:]:
+            self.update(float(price))
+
+    def to_dict(self) -> dict:
+        return {"line": self.line.to_dict(), "ema": self.ema.to_dict(), "history": self.history,
+                "ema_values": list(self.ema_values), "count": self.count}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "KaufmanTrend":
+        trend = cls(history=state["history"])
+        trend.line = KaufmanIndicator.from_dict(state["line"])
+        trend.ema = ExponentialMovingAverage.from_dict(state["ema"])
+        trend.ema_values.extend(state["ema_values"])
+        trend.count = state["count"]
+        return trend
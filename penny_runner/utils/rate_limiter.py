@@ -0,0 +1,75 @@
+import asyncio
+from threading import Lock
+from time import monotonic, sleep
+
+from constants.settings import KITE_QUOTE_REQUESTS_PER_SECOND, KITE_ORDER_REQUESTS_PER_SECOND, \
+    KITE_API_REQUESTS_PER_SECOND
+
+
+class TokenBucket:
+    """
+        Thread safe token bucket.
+
+        Tokens are refilled at `rate` per second up to `capacity`. Each request takes one token and waits
+        if none is available, so the requests never exceed the quota of the api.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        """
+        :param rate: tokens added per second
+        :param capacity: maximum tokens which can be accumulated, defaults to the rate
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.__tokens = self.capacity
+        self.__last_refill = monotonic()
+        self.__lock = Lock()
+
+    def __reserve(self, tokens: float) -> float:
+        """
+        takes the tokens if available
+        :param tokens: number of tokens required
+        :return: 0 if the tokens are taken else the seconds to wait before trying again
+        """
+        with self.__lock:
+            now = monotonic()
+            self.__tokens = min(self.capacity, self.__tokens + (now - self.__last_refill) * self.rate)
+            self.__last_refill = now
+            if self.__tokens >= tokens:
+                self.__tokens -= tokens
+                return 0
+            return (tokens - self.__tokens) / self.rate
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        blocks the thread till the tokens are available
+        :param tokens: number of tokens required
+        :return: seconds spent waiting
+        """
+        waited = 0
+        wait = self.__reserve(tokens)
+        while wait > 0:
+            sleep(wait)
+            waited += wait
+            wait = self.__reserve(tokens)
+        return waited
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """
+        same as acquire but it suspends the coroutine instead of blocking the event loop
+        :param tokens: number of tokens required
+        :return: seconds spent waiting
+        """
+        waited = 0
+        wait = self.__reserve(tokens)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            wait = self.__reserve(tokens)
+        return waited
+
+
+# quote, ltp and ohlc share the same quota in kite
+quote_limiter = TokenBucket(KITE_QUOTE_REQUESTS_PER_SECOND)
+order_limiter = TokenBucket(KITE_ORDER_REQUESTS_PER_SECOND)
+api_limiter = TokenBucket(KITE_API_REQUESTS_PER_SECOND)
@@ -3,6 +3,7 @@ from logging import Logger
 from constants.enums.product_type import ProductType
 from constants.global_contexts import kite_context
 from constants.settings import DEBUG
+from utils.kite_scheduler import kite_scheduler
 
 from utils.logger import get_logger
 
@@ -19,7 +20,7 @@ def short(symbol: str, quantity: int, product_type: ProductType, exchange: str):
     if DEBUG:
         return True
     try:
-        response = kite_context.place_order(
+        response = kite_scheduler.place_order(
             variety=kite_context.VARIETY_REGULAR,
             order_type=kite_context.ORDER_TYPE_MARKET,
             exchange=kite_context.EXCHANGE_NSE if exchange == 'NSE' else kite_context.EXCHANGE_BSE,
@@ -50,7 +51,7 @@ def long(symbol: str, quantity: int, product_type: ProductType, exchange: str):
     if DEBUG:
         return True
     try:
-        response = kite_context.place_order(
+        response = kite_scheduler.place_order(
             variety=kite_context.VARIETY_REGULAR,
             order_type=kite_context.ORDER_TYPE_MARKET,
             exchange=kite_context.EXCHANGE_NSE if exchange == 'NSE' else kite_context.EXCHANGE_BSE,
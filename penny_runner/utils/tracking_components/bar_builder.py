@@ -0,0 +1,148 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+class BarBuilder:
+    """
+        Turns ticks into OHLC bars, each tick updates the bars in O(1).
+
+        The window of a bar is either
+        1. a number of ticks, every tick closing a bar of the latest ticks if sliding e.g. the latest 5 ticks
+           else the ticks are split into consecutive bars of that many ticks
+        2. a number of seconds of wall clock e.g. 60 or 900, the bars start at multiples of it
+        3. all the ticks received, i.e. a single bar which grows with every tick
+        The bars are kept in arrays which grow as needed and are exposed without copying.
+    """
+
+    def __init__(self, ticks: int | None = None, seconds: float | None = None, sliding: bool = False,
+                 capacity: int = 1024):
+        """
+        :param ticks: ticks in a bar
+        :param seconds: seconds of wall clock in a bar, used if ticks is not given
+        :param sliding: whether every tick closes a bar of the latest ticks, only for bars of ticks
+        :param capacity: bars for which space is reserved at the start
+        """
+        if ticks is not None and seconds is not None:
+            raise ValueError("a bar is either a number of ticks or a number of seconds")
+        if sliding and ticks is None:
+            raise ValueError("only bars of ticks can slide")
+        self.ticks = ticks
+        self.seconds = seconds
+        self.sliding = sliding
+        self.count = 0  # number of ticks consumed
+        self.__size = 0  # number of bars
+        self.__ohlc = np.empty((capacity, 4), dtype=np.float64)
+        self.__last_tick = np.empty(capacity, dtype=np.int64)  # number of the last tick of each bar
+        self.__start = np.empty(capacity, dtype=np.float64)  # wall clock start of each bar, nan for bars of ticks
+        self.__bar_ticks = 0  # ticks in the latest bar when the bars do not slide
+        # prices of the latest ticks and the candidates for the max and the min of the sliding window
+        self.__window: deque = deque(maxlen=ticks if sliding else None)
+        self.__max: deque = deque()
+        self.__min: deque = deque()
+
+    def __len__(self) -> int:
+        return self.__size
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.__ohlc[:self.__size, 0]
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.__ohlc[:self.__size, 1]
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.__ohlc[:self.__size, 2]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.__ohlc[:self.__size, 3]
+
+    @property
+    def last_tick(self) -> np.ndarray:
+        return self.__last_tick[:self.__size]
+
+    @property
+    def start(self) -> np.ndarray:
+        return self.__start[:self.__size]
+
+    def __new_bar(self, price: float, start: float):
+        if self.__size == len(self.__ohlc):
+            self.__ohlc = np.concatenate([self.__ohlc, np.empty_like(self.__ohlc)])
+            self.__last_tick = np.concatenate([self.__last_tick, np.empty_like(self.__last_tick)])
+            self.__start = np.concatenate([self.__start, np.empty_like(self.__start)])
+        self.__ohlc[self.__size] = price
+        self.__start[self.__size] = start
+        self.__size += 1
+        self.__bar_ticks = 0
+
+    def update(self, price: float, timestamp: float | None = None) -> None:
+        """
+        :param price: latest price
+        :param timestamp: seconds since the epoch of the tick, only needed for bars of seconds
+        :return: None
+        """
+        tick = self.count
+        self.count += 1
+
+        if self.sliding:
+            self.__slide(tick, price)
+            return
+
+        if self.__size == 0:
+            self.__new_bar(price, np.nan)
+        if self.seconds is not None:
+            start = timestamp - timestamp % self.seconds
+            if self.__bar_ticks > 0 and start != self.__start[self.__size - 1]:
+                self.__new_bar(price, start)
+            self.__start[self.__size - 1] = start
+        elif self.ticks is not None and self.__bar_ticks == self.ticks:
+            self.__new_bar(price, np.nan)
+
+        bar = self.__ohlc[self.__size - 1]
+        bar[1] = max(bar[1], price)
+        bar[2] = min(bar[2], price)
+        bar[3] = price
+        self.__last_tick[self.__size - 1] = tick
+        self.__bar_ticks += 1
+
+    def __slide(self, tick: int, price: float):
+        self.__window.append(price)
+        # the candidates are kept in decreasing order for the max and increasing order for the min
+        while self.__max and self.__max[-1][1] <= price:
+            self.__max.pop()
+        self.__max.append((tick, price))
+        while self.__min and self.__min[-1][1] >= price:
+            self.__min.pop()
+        self.__min.append((tick, price))
+        for candidates in [self.__max, self.__min]:
+            if candidates[0][0] <= tick - self.ticks:
+                candidates.popleft()
+
+        if len(self.__window) == self.ticks:
+            self.__new_bar(self.__window[0], np.nan)
+            self.__ohlc[self.__size - 1, 1:] = self.__max[0][1], self.__min[0][1], price
+            self.__last_tick[self.__size - 1] = tick
+
+    def sync(self, prices):
+        """
+        feeds the prices which have not been consumed yet
+        :param prices: all the prices in order
+        :return: None
+        """
+        for price in prices[self.count:]:
+            self.update(float(price))
+
+    def frame(self) -> pd.DataFrame:
+        """
+        :return: copy of the bars indexed by their last tick, as rolling over the ticks gives them
+        """
+        return pd.DataFrame({
+            "Open": self.open,
+            "Close": self.close,
+            "High": self.high,
+            "Low": self.low
+        }, index=self.last_tick.copy())
@@ -0,0 +1,101 @@
+import json
+import random
+import struct
+import sys
+
+from autobahn.twisted.websocket import WebSocketServerFactory, WebSocketServerProtocol
+from twisted.internet import reactor, task
+
+from constants.settings import CURRENT_STOCK_EXCHANGE
+
+# the last byte of an instrument token is the segment, which decides the price divisor used by the ticker
+SEGMENTS = {"NSE": 1, "BSE": 4}
+
+
+def fake_instrument_tokens(symbols: list[str], exchange: str = CURRENT_STOCK_EXCHANGE) -> dict[str, int]:
+    """
+    assigns a deterministic instrument token to every symbol so that the feed can be used without the kite api
+    :param symbols: list of symbols without NS or NSE
+    :param exchange: exchange of the symbols
+    :return: mapping of symbol to instrument token
+    """
+    return {symbol: ((counter + 1) << 8) | SEGMENTS[exchange] for counter, symbol in enumerate(symbols)}
+
+
+def pack_ltp(prices: dict[int, float]) -> bytes:
+    """
+    packs the prices in the binary format of the kite ticker in LTP mode
+    :param prices: mapping of instrument token to last price
+    :return: binary message with all packets
+    """
+    message = struct.pack(">H", len(prices))
+    for token, price in prices.items():
+        message += struct.pack(">H", 8) + struct.pack(">II", token, int(round(price * 100)))
+    return message
+
+
+class FakeTickerProtocol(WebSocketServerProtocol):
+    """
+        Handles the subscribe, unsubscribe and mode messages sent by the KiteTicker client.
+    """
+
+    def onOpen(self):
+        self.subscribed = set()
+        self.factory.clients.append(self)
+
+    def onMessage(self, payload, is_binary):
+        if is_binary:
+            return
+        message = json.loads(payload.decode("utf8"))
+        if message["a"] == "subscribe":
+            self.subscribed.update(message["v"])
+        elif message["a"] == "unsubscribe":
+            self.subscribed.difference_update(message["v"])
+
+    def onClose(self, was_clean, code, reason):
+        if self in self.factory.clients:
+            self.factory.clients.remove(self)
+
+
+class FakeTickerFactory(WebSocketServerFactory):
+    """
+        Local ticker server which moves the prices as a random walk and broadcasts them to all the clients.
+
+        It is used to test the price feed offline.
+    """
+    protocol = FakeTickerProtocol
+
+    def __init__(self, url: str, prices: dict[int, float], volatility: float = 0.002):
+        super().__init__(url)
+        self.clients: list[FakeTickerProtocol] = []
+        self.prices = prices
+        self.volatility = volatility
+
+    def tick(self):
+        for token in self.prices.keys():
+            self.prices[token] = max(0.05, self.prices[token] * (1 + random.gauss(0, self.volatility)))
+        for client in self.clients:
+            prices = {token: self.prices[token] for token in client.subscribed if token in self.prices}
+            if prices:
+                client.sendMessage(pack_ltp(prices), isBinary=True)
+
+
+def run(symbols: list[str], port: int = 8083, interval: float = 1, starting_price: float = 100):
+    """
+    starts the server and blocks till it is stopped
+    :param symbols: list of symbols to serve
+    :param port: port on which it listens
+    :param interval: seconds between two ticks
+    :param starting_price: price with which every symbol starts
+    :return: None
+    """
+    tokens = fake_instrument_tokens(symbols)
+    factory = FakeTickerFactory(f"ws://127.0.0.1:{port}", {token: starting_price for token in tokens.values()})
+    task.LoopingCall(factory.tick).start(interval)
+    reactor.listenTCP(port, factory)
+    reactor.run()
+
+
+if __name__ == "__main__":
+    # e.g. python -m utils.tracking_components.fake_ticker_server RELIANCE TCS
+    run(sys.argv[1:])
@@ -1,8 +1,11 @@
 from datetime import datetime
-import yfinance as yf
+
+import numpy as np
+import pandas as pd
 
 from constants.settings import YFINANCE_EXTENSION
-from utils.indicators.kaufman_indicator import kaufman_indicator
+from utils import price_cache
+from utils.indicators.kaufman_indicator import kaufman_indicator_batch
 
 
 def filter_stocks(obtained_stock_list):
@@ -12,8 +15,8 @@ def filter_stocks(obtained_stock_list):
         if '-BE' not in symbol:
             initial_stock_list.append(symbol)
 
-    monthly_data = yf.download(tickers=[f"{stock}.{YFINANCE_EXTENSION}" for stock in initial_stock_list], period='1y', interval='1d',
-                               show_errors=False)['Open']
+    monthly_data = price_cache.download(tickers=[f"{stock}.{YFINANCE_EXTENSION}" for stock in initial_stock_list], period='1y',
+                                        interval='1d', show_errors=False)['Open']
 
     monthly_data = monthly_data.bfill().ffill()
     monthly_data = monthly_data.dropna(axis=1)
@@ -21,27 +24,26 @@ def filter_stocks(obtained_stock_list):
     # checking whether all the stock follows 2 conditions
     # 1. going from below the medium line to above the medium line
     # 2. touching the minimum line and then increasing
-    final_stock_list = []
-
-    for stock_name in list(monthly_data.columns):
-        rsi_stock = monthly_data[[stock_name]]
-        rsi_stock.insert(1, "line", kaufman_indicator(rsi_stock[stock_name]))
-        rsi_stock.insert(2, "max", rsi_stock.line.rolling(window=60).max())
-        rsi_stock.insert(3, "min", rsi_stock.line.rolling(window=60).min())
-        rsi_stock.insert(4, "med", (8 / 10) * rsi_stock["max"] + (2 / 10) * rsi_stock["min"])
-        # going from below the medium line to above the medium line
-        check = (rsi_stock["line"] > rsi_stock["med"])
-        for index in range(check.shape[0]):
-            if index > 1:
-                if check.iloc[index] and check.iloc[index - 1] == False:
-                    if 6 > datetime.now().weekday() > 0:
-                        if (datetime.now() - check.index[index]).days < 2:
-                            final_stock_list.append(stock_name)
-                    # used for testing on sundays
-                    elif datetime.now().weekday() == 6:
-                        if (datetime.now() - check.index[index]).days < 3:
-                            final_stock_list.append(stock_name)
-                    else:
-                        if (datetime.now() - check.index[index]).days < 4:
-                            final_stock_list.append(stock_name)
-    return list(set(final_stock_list))
+
+    # kaufman line of all the stocks computed together, with its extremes of the last 60 days
+    lines = pd.DataFrame(kaufman_indicator_batch(monthly_data), index=monthly_data.index, columns=monthly_data.columns)
+    rolling_lines = lines.rolling(window=60)
+    med = (8 / 10) * rolling_lines.max() + (2 / 10) * rolling_lines.min()
+
+    # going from below the medium line to above the medium line, from the third day
+    check = (lines > med).to_numpy()
+    crossed = np.zeros(check.shape, dtype=bool)
+    crossed[2:] = check[2:] & ~check[1:-1]
+
+    # the crossing must be recent, the days allowed are more after a weekend
+    now = datetime.now()
+    if 6 > now.weekday() > 0:
+        max_days = 2
+    # used for testing on sundays
+    elif now.weekday() == 6:
+        max_days = 3
+    else:
+        max_days = 4
+    recent = np.asarray((now - monthly_data.index).days < max_days)
+
+    return list(monthly_data.columns[(crossed & recent[:, None]).any(axis=0)])
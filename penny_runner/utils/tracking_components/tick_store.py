@@ -0,0 +1,115 @@
+import json
+from logging import Logger
+from os import getcwd, makedirs, path as os_path, remove
+
+import numpy as np
+import pandas as pd
+
+from constants.settings import TICK_STORE_PATH
+from utils.logger import get_logger
+
+logger: Logger = get_logger(__name__)
+
+
+class TickStore:
+    """
+        Append only store of the prices of each tracked stock.
+
+        Every stock has its own file of raw float64 prices, so adding a price writes 8 bytes at the end of the file
+        and reading maps the file into memory instead of parsing it. Next to it the state of the indicators computed
+        from those prices is checkpointed.
+    """
+
+    def __init__(self, root: str):
+        """
+        :param root: directory of the files
+        """
+        self.root = root
+
+    def __path(self, stock_name: str) -> str:
+        return f"{self.root}/{stock_name}.f64"
+
+    def __state_path(self, stock_name: str) -> str:
+        return f"{self.root}/{stock_name}.state.json"
+
+    def __migrate(self, stock_name: str):
+        """
+        the prices of a stock tracked before the store existed are moved from temp/{stock}.csv
+        """
+        csv_path = getcwd() + f"/temp/{stock_name}.csv"
+        if not os_path.exists(self.__path(stock_name)) and os_path.exists(csv_path):
+            logger.info(f"moving the prices of {stock_name} from the csv to the tick store")
+            self.write(stock_name, pd.read_csv(csv_path, index_col=0)['price'].to_numpy())
+            remove(csv_path)
+
+    def write(self, stock_name: str, prices) -> None:
+        """
+        replaces the prices of the stock
+        :param stock_name: symbol without NS or NSE
+        :param prices: prices in the order they were received
+        :return: None
+        """
+        makedirs(self.root, exist_ok=True)
+        with open(self.__path(stock_name), "wb") as file:
+            file.write(np.asarray(prices, dtype=np.float64).tobytes())
+        # the checkpoint was computed from the replaced prices
+        if os_path.exists(self.__state_path(stock_name)):
+            remove(self.__state_path(stock_name))
+
+    def append(self, stock_name: str, price: float) -> None:
+        """
+        :param stock_name: symbol without NS or NSE
+        :param price: latest price
+        :return: None
+        """
+        self.__migrate(stock_name)
+        makedirs(self.root, exist_ok=True)
+        with open(self.__path(stock_name), "ab") as file:
+            file.write(np.float64(price).tobytes())
+
+    def read(self, stock_name: str, last_n: int | None = None) -> np.ndarray:
+        """
+        :param stock_name: symbol without NS or NSE
+        :param last_n: number of latest prices, all the prices when not given
+        :return: read only view of the prices mapped from the file, empty if the stock has no prices
+        """
+        self.__migrate(stock_name)
+        file_path = self.__path(stock_name)
+        if not os_path.exists(file_path) or os_path.getsize(file_path) == 0:
+            return np.empty(0, dtype=np.float64)
+        prices = np.memmap(file_path, dtype=np.float64, mode="r")
+        return prices if last_n is None else prices[max(0, len(prices) - last_n):]
+
+    def remove(self, stock_name: str) -> None:
+        """
+        deletes the prices of the stock once it is no longer tracked
+        :param stock_name: symbol without NS or NSE
+        :return: None
+        """
+        for file_path in [self.__path(stock_name), self.__state_path(stock_name), getcwd() + f"/temp/{stock_name}.csv"]:
+            if os_path.exists(file_path):
+                remove(file_path)
+
+    def save_state(self, stock_name: str, state: dict) -> None:
+        """
+        :param stock_name: symbol without NS or NSE
+        :param state: json serialisable state of the indicators of the stock
+        :return: None
+        """
+        makedirs(self.root, exist_ok=True)
+        with open(self.__state_path(stock_name), "w") as file:
+            json.dump(state, file)
+
+    def load_state(self, stock_name: str) -> dict | None:
+        """
+        :param stock_name: symbol without NS or NSE
+        :return: the last saved state of the indicators of the stock or None if there is none
+        """
+        try:
+            with open(self.__state_path(stock_name)) as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+
+tick_store = TickStore(getcwd() + TICK_STORE_PATH)
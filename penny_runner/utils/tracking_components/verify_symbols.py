@@ -4,9 +4,12 @@ import pandas as pd
 
 from os import getcwd
 
-from constants.global_contexts import kite_context
-from constants.settings import MIS_STOCK_LIST, CURRENT_STOCK_EXCHANGE
+from constants.enums.request_priority import RequestPriority
+from constants.settings import MIS_STOCK_LIST, KITE_LTP_BLOCK_SIZE
 from constants.settings import STOCK_NAME_PATH
+from utils.kite_scheduler import kite_scheduler
+from utils.tracking_components.symbol_series import load_series, save_series, series_instruments, update_series, \
+    mark_untraded
 
 from utils.tracking_components.get_stock_list import filter_penny_stocks
 
@@ -24,28 +27,33 @@ async def get_correct_symbol(lower_price=50, higher_price=800, initial_stock_lis
         data = filter_penny_stocks()
         initial_stock_list = data[['Symbol']]
 
-    async def get_stocks(sub_list_of_stocks: list):
+    async def get_stocks(instruments: list):
         """
-        Given a list of symbols, it identifies whether there is a BE in symbol or not.
-        If the symbol is not removed or has -BE then it is included in output else it is ignored
-        :param sub_list_of_stocks: a list of stock symbols
+        Given a list of instruments, the ones which are not traded are not present in the output.
+        :param instruments: a list of instruments e.g. ['NSE:20MICRONS-BE', 'NSE:RELIANCE']
         :return: dictionary with a key as correct stock symbol and value as current stock price
         """
-        dict1 = {}
-        dict1.update(kite_context.ltp([f"{CURRENT_STOCK_EXCHANGE}:{stock}" for stock in sub_list_of_stocks]))
-        dict1.update(kite_context.ltp([f"{CURRENT_STOCK_EXCHANGE}:{stock}-BE" for stock in sub_list_of_stocks]))
-        return dict1
+        # the scheduler waits for the quota and runs the blocking call in its pool, which keeps the event loop free
+        return await asyncio.wrap_future(kite_scheduler.submit("ltp", instruments, priority=RequestPriority.UNIVERSE_LTP))
 
-    # dividing the entire list into a sub blocks of 300 stocks or fewer (for the last one)
-    blocks = [(counter * 300, (counter + 1) * 300) for counter in range(int(len(initial_stock_list) / 300))]
-    if len(initial_stock_list) % 300 > 0:
-        blocks.append((int(len(initial_stock_list) / 300) * 300, len(initial_stock_list)))
+    # the series resolved earlier today is reused so that only the series in which a symbol trades is queried,
+    # the symbols which are not resolved yet are queried for both the series
+    load_series()
+    all_instruments = series_instruments(initial_stock_list['Symbol'])
 
-    # asynchronously getting the prices for each sub block
+    # dividing the entire list into sub blocks of the maximum instruments allowed in one request
+    blocks = [(start, start + KITE_LTP_BLOCK_SIZE) for start in range(0, len(all_instruments), KITE_LTP_BLOCK_SIZE)]
+
+    # concurrently getting the prices for each sub block, paced by the quote quota
     data = await asyncio.gather(*[
-        get_stocks(initial_stock_list['Symbol'][block[0]:block[1]]) for block in blocks
+        get_stocks(all_instruments[block[0]:block[1]]) for block in blocks
     ])
 
+    # the entire universe has been queried, so whatever is not resolved now does not trade today
+    resolved = True in [update_series(block) for block in data]
+    if mark_untraded(initial_stock_list['Symbol']) or resolved:
+        save_series()
+
     # one block is one dict of form {'NSE:20MICRONS-BE':234.23,'NSE:RELIANCE':3435.23}
     # hence iterating through one block at a time merging all data into one after removing NSE
     raw_data = {re.split(":", key)[-1]: [block[key]['last_price']] for block in data for key in block.keys()}